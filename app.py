@@ -6,9 +6,15 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
+
 from ctgov_pipeline.config import load_config
 from ctgov_pipeline.pipeline import generate_digest, link_pubmed, sync_ctgov
 
@@ -20,11 +26,13 @@ class AppPaths:
     digest_path: Path
 
 
+@st.cache_resource
 def _paths() -> AppPaths:
     """Resolve config/db paths.
 
     Streamlit Community Cloud: use st.secrets for paths if provided.
-    Local dev: defaults to files in the repo root.
+    Local dev: defaults to files in the repo root. Cached for the app's
+    lifetime — secrets and path existence don't change between reruns.
     """
 
     cfg = Path(str(st.secrets.get("CONFIG_PATH", "config.yaml")))
@@ -36,65 +44,152 @@ def _paths() -> AppPaths:
     return AppPaths(config_path=cfg, db_path=db, digest_path=digest)
 
 
+@st.cache_resource
+def _conn(db_path_str: str) -> sqlite3.Connection:
+    """Shared read-only SQLite connection, held for the app's lifetime.
+
+    Keeping one connection per process preserves SQLite's page cache
+    across queries and skips per-call open/close overhead. The dashboard
+    never writes, so query_only guards against accidental mutation.
+    """
+
+    # mode=ro raises OperationalError (instead of creating an empty
+    # file) when the DB does not exist yet; callers treat that as "no
+    # data", replacing the old Path.exists() stat on every cache miss.
+    conn = sqlite3.connect(f"file:{db_path_str}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+
 def _safe_json_loads(x: Any, default: Any) -> Any:
     if x is None:
         return default
     try:
+        if orjson is not None:
+            return orjson.loads(x)
         return json.loads(x)
     except Exception:
         return default
 
 
-@st.cache_data(ttl=600)
-def load_trials(db_path_str: str) -> pd.DataFrame:
-    """Load the trials table into a DataFrame.
-
-    Cached to keep the app snappy; cache invalidates automatically after ttl.
+_TRIAL_COLUMNS = [
+    "nct_id",
+    "brief_title",
+    "official_title",
+    "acronym",
+    "overall_status",
+    "study_type",
+    "phase",
+    "modality",
+    "enrollment",
+    "lead_sponsor_name",
+    "lead_sponsor_class",
+    "has_results",
+    "primary_completion_date_parsed",
+    "last_update_post_date_parsed",
+    "results_first_post_date_parsed",
+    "days_to_primary_completion",
+    "urgency_score",
+    "major_score",
+    "interesting_score",
+    "total_score",
+    "topic_tags_json",
+    "conditions_json",
+    "interventions_json",
+    "intervention_types_json",
+    "contacts_json",
+    "score_reasons_json",
+    "pubmed_count",
+    "pubmed_latest_date",
+]
+
+_TRIALS_SELECT = "SELECT " + ", ".join(_TRIAL_COLUMNS) + " FROM trials"
+
+
+def _fresh_parquet_sidecar(db_path: Path) -> Path | None:
+    """Return the sync job's Parquet sidecar if it is newer than the DB."""
+    pq = db_path.with_suffix(".parquet")
+    try:
+        if pq.exists() and pq.stat().st_mtime >= db_path.stat().st_mtime:
+            return pq
+    except OSError:
+        pass
+    return None
+
+
+@st.cache_data(ttl=600, persist="disk", max_entries=32)
+def load_trials(
+    db_path_str: str,
+    days_lo: int | None = None,
+    days_hi: int | None = None,
+    min_total: int = 0,
+) -> pd.DataFrame:
+    """Load trials into a DataFrame, pushing cheap predicates into SQL.
+
+    The days window and minimum-score cutoff discard most rows for the
+    default "actionable only" view, so filtering in SQL avoids reading
+    and JSON-decoding rows the UI never shows. Cached per parameter
+    tuple; cache invalidates automatically after ttl.
     """
 
-    db_path = Path(db_path_str)
-    if not db_path.exists():
-        return pd.DataFrame()
-
-    conn = sqlite3.connect(str(db_path))
-    try:
-        df = pd.read_sql_query(
-            """
-            SELECT
-              nct_id,
-              brief_title,
-              official_title,
-              acronym,
-              overall_status,
-              study_type,
-              phase,
-              modality,
-              enrollment,
-              lead_sponsor_name,
-              lead_sponsor_class,
-              has_results,
-              primary_completion_date_parsed,
-              last_update_post_date_parsed,
-              results_first_post_date_parsed,
-              days_to_primary_completion,
-              urgency_score,
-              major_score,
-              interesting_score,
-              total_score,
-              topic_tags_json,
-              conditions_json,
-              interventions_json,
-              intervention_types_json,
-              contacts_json,
-              score_reasons_json,
-              pubmed_count,
-              pubmed_latest_date
-            FROM trials
-            """,
-            conn,
+    pq = _fresh_parquet_sidecar(Path(db_path_str))
+    if pq is not None:
+        df = pd.read_parquet(pq, columns=_TRIAL_COLUMNS, dtype_backend="pyarrow")
+        if days_lo is not None and days_hi is not None:
+            d = df["days_to_primary_completion"]
+            df = df[d.notna() & (d >= days_lo) & (d <= days_hi)]
+        if min_total > 0:
+            df = df[df["total_score"].fillna(0) >= min_total]
+        df = df.sort_values(
+            ["total_score", "days_to_primary_completion"],
+            ascending=[False, True],
+            na_position="last",
+        ).reset_index(drop=True)
+    else:
+        where: List[str] = []
+        params: List[Any] = []
+        if days_lo is not None and days_hi is not None:
+            where.append("days_to_primary_completion BETWEEN ? AND ?")
+            params.extend([int(days_lo), int(days_hi)])
+        if min_total > 0:
+            where.append("COALESCE(total_score, 0) >= ?")
+            params.append(int(min_total))
+
+        sql = _TRIALS_SELECT
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # Rank once here; boolean-mask filtering downstream preserves order,
+        # so the dashboard never re-sorts on a rerun. NULLs sort last to
+        # match the previous pandas na_position="last" behaviour.
+        sql += (
+            " ORDER BY total_score DESC,"
+            " days_to_primary_completion IS NULL, days_to_primary_completion ASC"
         )
-    finally:
-        conn.close()
+
+        # Arrow-backed dtypes give dictionary-encoded strings and compact
+        # numerics; pyarrow is already a Streamlit dependency. The JSON
+        # columns are re-assigned to Python objects just below. Reading
+        # in chunks bounds the sqlite3 row-materialization working set
+        # as the table grows.
+        try:
+            chunks = list(
+                pd.read_sql_query(
+                    sql,
+                    _conn(db_path_str),
+                    params=params or None,
+                    dtype_backend="pyarrow",
+                    chunksize=50_000,
+                )
+            )
+        except (sqlite3.OperationalError, pd.errors.DatabaseError):
+            # Missing or not-yet-initialized DB; same outcome as the old
+            # up-front existence check, without a stat per cache miss.
+            return pd.DataFrame()
+        if not chunks:
+            return pd.DataFrame()
+        df = pd.concat(chunks, ignore_index=True, copy=False) if len(chunks) > 1 else chunks[0]
 
     # Parse JSON-ish columns into python objects for easier filtering/preview.
     json_cols = [
@@ -105,12 +200,13 @@ def load_trials(db_path_str: str) -> pd.DataFrame:
         "contacts_json",
         "score_reasons_json",
     ]
+    # Decode over the backing arrays directly; Series.apply pays pandas
+    # dispatch overhead per cell, a plain comprehension does not.
     for col in json_cols:
         if col in df.columns:
-            if col.endswith("_json") and col not in {"contacts_json", "score_reasons_json"}:
-                df[col] = df[col].apply(lambda v: _safe_json_loads(v, default=[]))
-            else:
-                df[col] = df[col].apply(lambda v: _safe_json_loads(v, default={}))
+            default: Any = {} if col in {"contacts_json", "score_reasons_json"} else []
+            arr = df[col].to_numpy(copy=False)
+            df[col] = [_safe_json_loads(v, default) for v in arr]
 
     # Ensure numeric where possible
     for col in [
@@ -125,43 +221,156 @@ def load_trials(db_path_str: str) -> pd.DataFrame:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
 
+    df["_haystack_lower"] = _build_haystack(df)
+
+    # Pack topic membership into a uint64 bitmask so the topic filter is
+    # a single vectorized AND. Skipped (falling back to the exploded
+    # index) in the unlikely event the config defines >64 topics.
+    all_topics = _all_topics(db_path_str)
+    if all_topics and len(all_topics) <= 64:
+        bit_of = {t: 1 << i for i, t in enumerate(all_topics)}
+        df["_topic_bits"] = np.array(
+            [
+                sum(bit_of.get(t, 0) for t in tags) if isinstance(tags, list) else 0
+                for tags in df["topic_tags_json"]
+            ],
+            dtype=np.uint64,
+        )
+        # The bit assignment travels with the frame (attrs survive the
+        # cache pickle): this frame persists to disk and the topic list
+        # is cached separately, so decoding against a freshly derived
+        # assignment would silently mis-filter once the topic set changes.
+        df.attrs["_topic_bit_of"] = bit_of
+
     return df
 
 
 @st.cache_data(ttl=600)
-def load_pubmed_citations(db_path_str: str, nct_id: str) -> pd.DataFrame:
-    db_path = Path(db_path_str)
-    if not db_path.exists() or not nct_id:
+def load_pubmed_citations(db_path_str: str, nct_ids: Tuple[str, ...]) -> pd.DataFrame:
+    """Load citations for a whole set of trials in one query.
+
+    Fetching per selected trial meant a fresh query every time the user
+    stepped through the dropdown; loading the visible set once and
+    slicing locally amortizes that cost.
+    """
+
+    if not nct_ids:
         return pd.DataFrame()
-    conn = sqlite3.connect(str(db_path))
+    frames: List[pd.DataFrame] = []
+    # Chunk to stay under SQLite's bound-parameter limit.
+    try:
+        for i in range(0, len(nct_ids), 500):
+            chunk = nct_ids[i : i + 500]
+            placeholders = ",".join(["?"] * len(chunk))
+            frames.append(
+                pd.read_sql_query(
+                    f"""
+                    SELECT nct_id, pmid, title, source, pub_date, doi
+                    FROM pubmed_citations
+                    WHERE nct_id IN ({placeholders})
+                    ORDER BY pub_date DESC
+                    """,
+                    _conn(db_path_str),
+                    params=tuple(chunk),
+                )
+            )
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+@st.cache_data(ttl=600)
+def _trial_count(db_path_str: str) -> int:
     try:
-        df = pd.read_sql_query(
+        return int(_conn(db_path_str).execute("SELECT COUNT(*) FROM trials").fetchone()[0])
+    except sqlite3.OperationalError:
+        return 0
+
+
+@st.cache_data(ttl=600)
+def _facet_frame(db_path_str: str) -> pd.DataFrame:
+    """Slim unfiltered projection used to populate the sidebar widgets.
+
+    Widget option lists must come from the whole table (not the filtered
+    view), so this stays separate from the parametrized load_trials.
+    """
+
+    try:
+        return pd.read_sql_query(
             """
-            SELECT pmid, title, source, pub_date, doi
-            FROM pubmed_citations
-            WHERE nct_id = ?
-            ORDER BY pub_date DESC
+            SELECT phase, modality, lead_sponsor_class, overall_status,
+                   days_to_primary_completion
+            FROM trials
             """,
-            conn,
-            params=(nct_id,),
+            _conn(db_path_str),
         )
-    finally:
-        conn.close()
-    return df
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=600)
+def _facets(db_path_str: str) -> Dict[str, List[str]]:
+    """Sorted unique non-empty values per filter column, computed once.
 
+    The sidebar reruns on every widget interaction; enumerating facet
+    options through pd.unique here (and caching the result) keeps that
+    rerun cost off the hot path.
+    """
+
+    facets = _facet_frame(db_path_str)
+    out: Dict[str, List[str]] = {}
+    for col in ["phase", "modality", "lead_sponsor_class", "overall_status"]:
+        if facets.empty or col not in facets.columns:
+            out[col] = []
+            continue
+        u = pd.Series(pd.unique(facets[col].to_numpy(copy=False))).dropna().astype(str).str.strip()
+        out[col] = sorted(u[u != ""].tolist())
+    return out
 
-def _all_topics(df: pd.DataFrame) -> List[str]:
-    topics: List[str] = []
-    if "topic_tags_json" not in df.columns or df.empty:
-        return topics
-    for tags in df["topic_tags_json"].tolist():
-        if isinstance(tags, list):
-            topics.extend([str(t) for t in tags if t])
-    return sorted(list(dict.fromkeys(topics)))
 
+@st.cache_data(ttl=600)
+def _topic_index(db_path_str: str) -> pd.DataFrame:
+    """Exploded (nct_id, topic) membership pairs, built once per load.
+
+    Lets the topic filter run as vectorized isin lookups instead of a
+    per-row any() over the tag lists on every rerun.
+    """
 
-def _token_haystack(row: pd.Series) -> str:
-    parts: List[str] = []
+    try:
+        df = pd.read_sql_query("SELECT nct_id, topic_tags_json FROM trials", _conn(db_path_str))
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return pd.DataFrame(columns=["nct_id", "topic"])
+    if df.empty:
+        return pd.DataFrame(columns=["nct_id", "topic"])
+    df["topic_tags_json"] = [_safe_json_loads(v, []) for v in df["topic_tags_json"].to_numpy(copy=False)]
+    idx = df.explode("topic_tags_json")
+    idx = idx.rename(columns={"topic_tags_json": "topic"}).dropna(subset=["topic"])
+    idx["topic"] = idx["topic"].astype(str)
+    return idx
+
+
+@st.cache_data(ttl=600)
+def _all_topics(db_path_str: str) -> List[str]:
+    idx = _topic_index(db_path_str)
+    if idx.empty:
+        return []
+    return sorted(idx["topic"].unique().tolist())
+
+
+def _build_haystack(df: pd.DataFrame) -> pd.Series:
+    """Build one lowercase search string per trial, vectorized.
+
+    Computed once at load time so the search filter is a single C-level
+    `str.contains` instead of a per-row Python apply on every rerun.
+    """
+
+    if df.empty:
+        return pd.Series("", index=df.index, dtype="object")
+
+    # Accumulate on numpy object arrays: concatenating Series of mixed
+    # string dtypes ('str' from Arrow-backed columns vs 'object') raises
+    # on pandas 3.x, and the ndarray path skips per-step index alignment.
+    parts: List[np.ndarray] = []
     for c in [
         "brief_title",
         "official_title",
@@ -172,43 +381,55 @@ def _token_haystack(row: pd.Series) -> str:
         "phase",
         "modality",
     ]:
-        v = row.get(c)
-        if v:
-            parts.append(str(v))
+        if c in df.columns:
+            parts.append(df[c].fillna("").astype(str).to_numpy(dtype=object))
     for c in ["conditions_json", "interventions_json", "intervention_types_json"]:
-        v = row.get(c)
-        if isinstance(v, list) and v:
-            parts.extend([str(x) for x in v])
-    return " ".join(parts).lower()
+        if c in df.columns:
+            parts.append(
+                np.array(
+                    [" ".join(map(str, v)) if isinstance(v, list) else "" for v in df[c].to_numpy(copy=False)],
+                    dtype=object,
+                )
+            )
+    if not parts:
+        return pd.Series("", index=df.index, dtype="object")
+    hay = parts[0]
+    for p in parts[1:]:
+        hay = hay + " " + p
+    return pd.Series(hay, index=df.index, dtype="object").str.lower()
 
 
-def _filter_df(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, object]]:
-    """Apply sidebar filters. Returns (filtered_df, filter_state)."""
+def _filter_df(db_path_str: str) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """Render sidebar filters, then load only the matching trials.
+
+    Widgets render first (from the cached facet projection) so the days
+    window and minimum-score cutoff can be pushed into the SQL query
+    instead of loading the whole table and discarding most of it.
+    Returns (filtered_df, filter_state).
+    """
 
     st.sidebar.header("Filters")
 
-    if df.empty:
-        return df, {}
+    facets = _facet_frame(db_path_str)
+    if facets.empty:
+        return pd.DataFrame(), {}
 
-    topics = _all_topics(df)
+    topics = _all_topics(db_path_str)
     selected_topics = st.sidebar.multiselect("Topics", topics, default=topics)
 
-    phase_values = sorted([p for p in df["phase"].dropna().unique().tolist() if str(p).strip()])
-    selected_phases = st.sidebar.multiselect("Phase", phase_values, default=phase_values)
+    facet_values = _facets(db_path_str)
+    selected_phases = st.sidebar.multiselect("Phase", facet_values["phase"], default=facet_values["phase"])
 
-    modality_values = sorted([m for m in df["modality"].dropna().unique().tolist() if str(m).strip()])
-    selected_modalities = st.sidebar.multiselect("Modality", modality_values, default=modality_values)
+    selected_modalities = st.sidebar.multiselect("Modality", facet_values["modality"], default=facet_values["modality"])
 
-    sponsor_class_values = sorted(
-        [s for s in df["lead_sponsor_class"].dropna().unique().tolist() if str(s).strip()]
+    selected_sponsor_classes = st.sidebar.multiselect(
+        "Sponsor class", facet_values["lead_sponsor_class"], default=facet_values["lead_sponsor_class"]
     )
-    selected_sponsor_classes = st.sidebar.multiselect("Sponsor class", sponsor_class_values, default=sponsor_class_values)
 
-    status_values = sorted([s for s in df["overall_status"].dropna().unique().tolist() if str(s).strip()])
-    selected_statuses = st.sidebar.multiselect("Status", status_values, default=status_values)
+    selected_statuses = st.sidebar.multiselect("Status", facet_values["overall_status"], default=facet_values["overall_status"])
 
     # Days-to-primary-completion slider (readout radar)
-    days = df["days_to_primary_completion"].dropna()
+    days = facets["days_to_primary_completion"].dropna()
     if len(days) > 0:
         dmin = int(days.min())
         dmax = int(days.max())
@@ -243,44 +464,55 @@ def _filter_df(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, object]]:
         placeholder="e.g., GLP-1, mortality, bispecific",
     ).strip()
 
-    out = df.copy()
-
-    if selected_topics and "topic_tags_json" in out.columns:
-        out = out[out["topic_tags_json"].apply(lambda tags: any(t in (tags or []) for t in selected_topics))]
+    # Resolve the effective days window and push it (plus the score
+    # cutoff) into the SQL load; NULL days drop out of BETWEEN, matching
+    # the previous notna() semantics.
+    days_lo: int | None = None
+    days_hi: int | None = None
+    if days_range is not None:
+        days_lo, days_hi = int(days_range[0]), int(days_range[1])
+    if only_actionable:
+        days_lo = -180 if days_lo is None else max(days_lo, -180)
+        days_hi = 180 if days_hi is None else min(days_hi, 180)
+
+    out = load_trials(db_path_str, days_lo=days_lo, days_hi=days_hi, min_total=int(min_total))
+    if out.empty:
+        return out, {}
+
+    # Combine all remaining predicates into one boolean mask and index
+    # once, instead of rebuilding the frame per filter.
+    mask = np.ones(len(out), dtype=bool)
+
+    if selected_topics and len(selected_topics) < len(topics):
+        # Decode with the bit assignment stored on the frame itself --
+        # never one re-derived from _all_topics, whose cache expires
+        # independently of the (disk-persisted) frame.
+        bit_of = out.attrs.get("_topic_bit_of")
+        if bit_of is not None and "_topic_bits" in out.columns:
+            wanted = sum(bit_of.get(t, 0) for t in selected_topics)
+            mask &= (out["_topic_bits"].to_numpy() & np.uint64(wanted)) != 0
+        else:
+            idx = _topic_index(db_path_str)
+            matched_ids = idx.loc[idx["topic"].isin(selected_topics), "nct_id"].unique()
+            mask &= out["nct_id"].isin(matched_ids).to_numpy()
 
     if selected_phases:
-        out = out[out["phase"].isin(selected_phases)]
+        mask &= out["phase"].isin(selected_phases).to_numpy()
 
     if selected_modalities:
-        out = out[out["modality"].isin(selected_modalities)]
+        mask &= out["modality"].isin(selected_modalities).to_numpy()
 
     if selected_sponsor_classes:
-        out = out[out["lead_sponsor_class"].isin(selected_sponsor_classes)]
+        mask &= out["lead_sponsor_class"].isin(selected_sponsor_classes).to_numpy()
 
     if selected_statuses:
-        out = out[out["overall_status"].isin(selected_statuses)]
-
-    if days_range is not None:
-        lo, hi = days_range
-        out = out[
-            (out["days_to_primary_completion"].notna())
-            & (out["days_to_primary_completion"] >= lo)
-            & (out["days_to_primary_completion"] <= hi)
-        ]
-
-    out = out[(out["total_score"].fillna(0) >= float(min_total))]
-
-    if only_actionable:
-        out = out[
-            (out["days_to_primary_completion"].notna())
-            & (out["days_to_primary_completion"] >= -180)
-            & (out["days_to_primary_completion"] <= 180)
-        ]
+        mask &= out["overall_status"].isin(selected_statuses).to_numpy()
 
     if q:
-        out = out[out.apply(_token_haystack, axis=1).str.contains(q.lower(), na=False)]
+        mask &= out["_haystack_lower"].str.contains(q.lower(), regex=False, na=False).to_numpy()
 
-    out = out.sort_values(["total_score", "days_to_primary_completion"], ascending=[False, True])
+    if not mask.all():
+        out = out[mask]
 
     state = {
         "selected_topics": selected_topics,
@@ -302,7 +534,11 @@ def _trial_detail(df: pd.DataFrame, db_path: Path) -> None:
         return
 
     options = df[["nct_id", "brief_title"]].fillna("")
-    labels = options.apply(lambda r: f"{r['nct_id']} — {str(r['brief_title'])[:90]}".strip(" —"), axis=1).tolist()
+    labels = (
+        options["nct_id"].astype(str)
+        + " — "
+        + options["brief_title"].astype(str).str.slice(0, 90)
+    ).str.strip(" —").tolist()
     nct_to_label = dict(zip(df["nct_id"].tolist(), labels))
     selected = st.selectbox(
         "Select a trial to view details",
@@ -371,7 +607,11 @@ def _trial_detail(df: pd.DataFrame, db_path: Path) -> None:
         with st.expander("Contacts (best-effort extraction)"):
             st.json(contacts)
 
-    citations = load_pubmed_citations(str(db_path), str(row.get("nct_id")))
+    all_citations = load_pubmed_citations(str(db_path), tuple(df["nct_id"].astype(str)))
+    if all_citations.empty:
+        citations = all_citations
+    else:
+        citations = all_citations[all_citations["nct_id"] == str(row.get("nct_id"))]
     if not citations.empty:
         with st.expander("PubMed citations linked to this NCT"):
             citations = citations.copy()
@@ -416,20 +656,20 @@ def main() -> None:
                 "and keep the app read-only."
             )
 
-    df = load_trials(str(paths.db_path))
-    if df.empty:
+    n_total = _trial_count(str(paths.db_path))
+    if n_total == 0:
         st.warning(
             "No data found yet. Create a database by running `python -m ctgov_pipeline sync` locally, "
             "or set up a scheduled GitHub Action to generate `ctgov.sqlite` and commit it to the repo."
         )
         st.stop()
 
-    filtered, _ = _filter_df(df)
+    filtered, _ = _filter_df(str(paths.db_path))
 
     k1, k2, k3, k4 = st.columns(4)
-    k1.metric("Trials in DB", int(len(df)))
+    k1.metric("Trials in DB", n_total)
     k2.metric("Matching filters", int(len(filtered)))
-    k3.metric(">= Phase 3", int(filtered["phase"].fillna("").str.contains("PHASE3|PHASE4", case=False, na=False).sum()))
+    k3.metric(">= Phase 3", int(filtered["phase"].isin(["PHASE3", "PHASE4"]).sum()))
     k4.metric("Industry sponsored", int((filtered["lead_sponsor_class"].fillna("") == "INDUSTRY").sum()))
 
     st.subheader("Ranked trials")
@@ -15,6 +15,7 @@ class PubMedConfig:
     sleep_seconds: float = 0.4
     actionable_only: bool = True
     max_trials_per_run: int = 200
+    concurrency: int = 3
 
 
 @dataclass(frozen=True)
@@ -74,6 +75,7 @@ def load_config(path: Path) -> AppConfig:
         sleep_seconds=float(pm_raw.get("sleep_seconds", 0.4)),
         actionable_only=_as_bool(pm_raw.get("actionable_only"), True),
         max_trials_per_run=int(pm_raw.get("max_trials_per_run", 200)),
+        concurrency=int(pm_raw.get("concurrency", 3)),
     )
 
     topics_raw = raw.get("topics", []) or []
@@ -1,10 +1,43 @@
 from __future__ import annotations
 
+import json
+import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, Iterator, Optional
+from typing import Any, Dict, Iterator, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
+
+
+def _loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class _CachedResponse:
+    """Minimal stand-in for requests.Response rebuilt from cached bytes."""
+
+    def __init__(self, status_code: int, content: bytes, headers: Dict[str, str]) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", "replace")
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code} (cached response)")
 
 
 @dataclass
@@ -15,14 +48,83 @@ class CTGovClient:
     sleep_seconds: float = 0.25
     timeout_seconds: float = 30.0
     user_agent: str = "ctgov-trial-watch/0.1 (+https://example.org)"
+    # Optional on-disk response cache. Off by default so scheduled syncs
+    # always see fresh data; useful for development reruns where the
+    # same paginated walk repeats within the TTL.
+    cache_path: Optional[str] = None
+    cache_ttl_seconds: float = 3600.0
 
     def __post_init__(self) -> None:
         self._session = requests.Session()
         self._session.headers.update({"User-Agent": self.user_agent})
-
-    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        # Explicit pooling so keep-alive connections survive the whole
+        # paginated walk (one TLS handshake per sync, not per page).
+        # Retries cover transient 429/5xx hiccups mid-walk.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+            ),
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._cache: Optional[sqlite3.Connection] = None
+        self._cache_lock = threading.Lock()
+        if self.cache_path:
+            self._cache = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._cache.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    key TEXT PRIMARY KEY,
+                    status INTEGER,
+                    headers_json TEXT,
+                    body BLOB,
+                    fetched_at REAL
+                )
+                """
+            )
+            self._cache.commit()
+
+    @staticmethod
+    def _cache_key(path: str, params: Dict[str, Any]) -> str:
+        return path + "?" + json.dumps(params, sort_keys=True, default=str)
+
+    def _cache_get(self, key: str) -> Optional[_CachedResponse]:
+        if self._cache is None:
+            return None
+        with self._cache_lock:
+            row = self._cache.execute(
+                "SELECT status, headers_json, body, fetched_at FROM http_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if not row or (time.time() - float(row[3])) > self.cache_ttl_seconds:
+            return None
+        return _CachedResponse(int(row[0]), row[2], json.loads(row[1]))
+
+    def _cache_put(self, key: str, resp: requests.Response) -> None:
+        if self._cache is None or resp.status_code != 200:
+            return
+        with self._cache_lock:
+            self._cache.execute(
+                "INSERT OR REPLACE INTO http_cache (key, status, headers_json, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, resp.status_code, json.dumps(dict(resp.headers)), resp.content, time.time()),
+            )
+            self._cache.commit()
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Union[requests.Response, _CachedResponse]:
+        params = params or {}
+        key = self._cache_key(path, params)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
         url = self.base_url.rstrip("/") + "/" + path.lstrip("/")
-        resp = self._session.get(url, params=params or {}, timeout=self.timeout_seconds)
+        resp = self._session.get(url, params=params, timeout=self.timeout_seconds)
+        self._cache_put(key, resp)
         return resp
 
     def version(self) -> Dict[str, Any]:
@@ -33,7 +135,14 @@ class CTGovClient:
     def get_study(self, nct_id: str) -> Dict[str, Any]:
         resp = self._get(f"studies/{nct_id}")
         resp.raise_for_status()
-        return resp.json()
+        return _loads(resp.content)
+
+    def _fetch_page(self, params: Dict[str, Any], *, delay: float = 0.0) -> requests.Response:
+        # Runs on the prefetch thread; the polite throttle happens there
+        # so it overlaps with parsing the previous page.
+        if delay:
+            time.sleep(delay)
+        return self._get("studies", params=params)
 
     def iter_studies(
         self,
@@ -46,41 +155,39 @@ class CTGovClient:
 
         The API returns study records page-by-page. If response includes `nextPageToken`,
         pass it back as `pageToken` to retrieve the next page.
+
+        The next page is prefetched on a background thread while the
+        current one is parsed and yielded, hiding network latency (and
+        the polite throttle) behind local work.
         """
         p = dict(params)
         # Default to JSON; API supports CSV too but this pipeline expects JSON.
         p.setdefault("format", "json")
         p.setdefault("pageSize", page_size)
+        p.pop("pageToken", None)
 
         page = 0
-        page_token: Optional[str] = None
-
-        while True:
-            page += 1
-            if max_pages is not None and page > max_pages:
-                break
-
-            if page_token:
-                p["pageToken"] = page_token
-            else:
-                p.pop("pageToken", None)
-
-            resp = self._get("studies", params=p)
-            if resp.status_code != 200:
-                raise RuntimeError(f"CT.gov API error {resp.status_code}: {resp.text[:500]}")
-
-            data = resp.json()
-
-            studies = data.get("studies") or []
-            for s in studies:
-                if isinstance(s, dict):
-                    yield s
-
-            # Pagination token can be either in JSON or (sometimes) in headers.
-            page_token = data.get("nextPageToken") or resp.headers.get("x-next-page-token") or resp.headers.get("X-Next-Page-Token")
-            if not page_token:
-                break
-
-            # polite throttling
-            if self.sleep_seconds:
-                time.sleep(self.sleep_seconds)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self._fetch_page, dict(p))
+            while future is not None:
+                page += 1
+                if max_pages is not None and page > max_pages:
+                    break
+
+                resp = future.result()
+                future = None
+                if resp.status_code != 200:
+                    raise RuntimeError(f"CT.gov API error {resp.status_code}: {resp.text[:500]}")
+
+                data = _loads(resp.content)
+
+                # Pagination token can be either in JSON or (sometimes) in headers.
+                page_token = data.get("nextPageToken") or resp.headers.get("x-next-page-token") or resp.headers.get("X-Next-Page-Token")
+                if page_token and (max_pages is None or page < max_pages):
+                    next_params = dict(p)
+                    next_params["pageToken"] = page_token
+                    future = pool.submit(self._fetch_page, next_params, delay=self.sleep_seconds)
+
+                for s in data.get("studies") or []:
+                    if isinstance(s, dict):
+                        yield s
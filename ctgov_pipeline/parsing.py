@@ -1,14 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import functools
+import json
 from datetime import date
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Final, List, NamedTuple, Optional, Tuple, Union
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
 
-def get_nested(obj: Dict[str, Any], path: str, default: Any = None) -> Any:
-    """Safely get a nested value from a dict using a dot-delimited path."""
+
+def get_nested(obj: Dict[str, Any], path_parts: Tuple[str, ...], default: Any = None) -> Any:
+    """Safely get a nested value from a dict using a pre-split path tuple.
+
+    Callers hoist the tuple to a module constant so the hot path does no
+    per-call string splitting.
+    """
     cur: Any = obj
-    for part in path.split("."):
+    for part in path_parts:
         if not isinstance(cur, dict):
             return default
         if part not in cur:
@@ -17,13 +27,63 @@ def get_nested(obj: Dict[str, Any], path: str, default: Any = None) -> Any:
     return cur
 
 
-@dataclass(frozen=True)
-class ParsedDate:
+def _module(obj: Any, key: str) -> Dict[str, Any]:
+    """Fetch a sub-dict, returning {} for missing or non-dict values."""
+    v = obj.get(key) if isinstance(obj, dict) else None
+    return v if isinstance(v, dict) else {}
+
+
+class ParsedDate(NamedTuple):
     raw: str
     value: Optional[date]
     precision: str  # DAY | MONTH | YEAR | NONE
 
 
+@functools.lru_cache(maxsize=8192)
+def _parse_partial_date_str(s: str) -> ParsedDate:
+    """Parse a non-empty, stripped date string; memoized since the same
+    strings recur heavily across a sync (ParsedDate is frozen, so the
+    cached instances are safe to share)."""
+    # Length-dispatched fast paths for the three shapes CT.gov actually
+    # sends; the generic split below only handles oddballs.
+    n = len(s)
+    if n == 10 and s[4] == "-" and s[7] == "-":
+        # Full YYYY-MM-DD dominates; date.fromisoformat is a C fast path.
+        try:
+            return ParsedDate(raw=s, value=date.fromisoformat(s), precision="DAY")
+        except ValueError:
+            pass
+    elif n == 7 and s[4] == "-":
+        try:
+            return ParsedDate(raw=s, value=date(int(s[:4]), int(s[5:7]), 15), precision="MONTH")
+        except ValueError:
+            pass
+    elif n == 4 and s.isdigit():
+        try:
+            return ParsedDate(raw=s, value=date(int(s), 7, 1), precision="YEAR")
+        except ValueError:
+            pass
+
+    parts = s.split("-")
+    try:
+        y = int(parts[0])
+        if len(parts) == 1:
+            # year precision → mid-year for ordering
+            return ParsedDate(raw=s, value=date(y, 7, 1), precision="YEAR")
+        if len(parts) == 2:
+            m = int(parts[1])
+            # month precision → mid-month for ordering
+            return ParsedDate(raw=s, value=date(y, m, 15), precision="MONTH")
+        if len(parts) >= 3:
+            m = int(parts[1])
+            d = int(parts[2])
+            return ParsedDate(raw=s, value=date(y, m, d), precision="DAY")
+    except Exception:
+        return ParsedDate(raw=s, value=None, precision="NONE")
+
+    return ParsedDate(raw=s, value=None, precision="NONE")
+
+
 def parse_partial_date(raw: Any) -> ParsedDate:
     """Parse date strings like YYYY, YYYY-MM, YYYY-MM-DD into a date.
 
@@ -43,28 +103,20 @@ def parse_partial_date(raw: Any) -> ParsedDate:
     if not s:
         return ParsedDate(raw="", value=None, precision="NONE")
 
-    parts = s.split("-")
-    try:
-        y = int(parts[0])
-        if len(parts) == 1:
-            # year precision → mid-year for ordering
-            return ParsedDate(raw=s, value=date(y, 7, 1), precision="YEAR")
-        if len(parts) == 2:
-            m = int(parts[1])
-            # month precision → mid-month for ordering
-            return ParsedDate(raw=s, value=date(y, m, 15), precision="MONTH")
-        if len(parts) >= 3:
-            m = int(parts[1])
-            d = int(parts[2])
-            return ParsedDate(raw=s, value=date(y, m, d), precision="DAY")
-    except Exception:
-        return ParsedDate(raw=s, value=None, precision="NONE")
+    return _parse_partial_date_str(s)
 
-    return ParsedDate(raw=s, value=None, precision="NONE")
+
+def _parse_date_struct(struct: Any) -> Tuple[ParsedDate, Optional[str]]:
+    """Unwrap a CT.gov date struct once, returning (parsed date, type)."""
+    t: Optional[str] = None
+    if isinstance(struct, dict):
+        t = struct.get("type")
+        struct = struct.get("date")
+    return parse_partial_date(struct), t
 
 
-def _extract_interventions(study: Dict[str, Any]) -> Tuple[List[str], List[str]]:
-    interventions = get_nested(study, "protocolSection.armsInterventionsModule.interventions", []) or []
+def _extract_interventions(arms_module: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    interventions = arms_module.get("interventions") or []
     names: List[str] = []
     types: List[str] = []
     if isinstance(interventions, list):
@@ -77,25 +129,15 @@ def _extract_interventions(study: Dict[str, Any]) -> Tuple[List[str], List[str]]
                 names.append(n.strip())
             if isinstance(t, str) and t.strip():
                 types.append(t.strip())
-    # de-duplicate while preserving order
-    def dedup(seq: Iterable[str]) -> List[str]:
-        seen = set()
-        out = []
-        for x in seq:
-            if x not in seen:
-                seen.add(x)
-                out.append(x)
-        return out
+    # de-duplicate while preserving order (dict.fromkeys is one C pass)
+    return list(dict.fromkeys(names)), list(dict.fromkeys(types))
 
-    return dedup(names), dedup(types)
 
-
-def _extract_contacts(study: Dict[str, Any]) -> Dict[str, Any]:
+def _extract_contacts(module: Dict[str, Any]) -> Dict[str, Any]:
     """Best-effort extraction of investigator/contact info."""
-    module = get_nested(study, "protocolSection.contactsLocationsModule", {}) or {}
     out: Dict[str, Any] = {"central_contacts": [], "overall_officials": []}
 
-    central = module.get("centralContacts") if isinstance(module, dict) else None
+    central = module.get("centralContacts")
     if isinstance(central, list):
         for c in central:
             if not isinstance(c, dict):
@@ -109,7 +151,7 @@ def _extract_contacts(study: Dict[str, Any]) -> Dict[str, Any]:
                 }
             )
 
-    officials = module.get("overallOfficials") if isinstance(module, dict) else None
+    officials = module.get("overallOfficials")
     if isinstance(officials, list):
         for o in officials:
             if not isinstance(o, dict):
@@ -125,94 +167,112 @@ def _extract_contacts(study: Dict[str, Any]) -> Dict[str, Any]:
     return out
 
 
+# CT.gov intervention type -> editor-friendly bucket, with a priority
+# so mixed-type trials resolve the same way the old cascaded checks did.
+_TYPE_TO_MODALITY: Final[Dict[str, str]] = {
+    "DRUG": "drug/biologic",
+    "BIOLOGICAL": "drug/biologic",
+    "GENETIC": "drug/biologic",
+    "GENE_TRANSFER": "drug/biologic",
+    "CELL_THERAPY": "drug/biologic",
+    "DEVICE": "device",
+    "PROCEDURE": "procedure/surgery",
+    "SURGERY": "procedure/surgery",
+    "RADIATION": "radiation",
+    "DIAGNOSTIC_TEST": "diagnostic",
+    "BEHAVIORAL": "behavioral",
+}
+_MODALITY_PRIORITY: Final[Dict[str, int]] = {
+    "drug/biologic": 0,
+    "device": 1,
+    "procedure/surgery": 2,
+    "radiation": 3,
+    "diagnostic": 4,
+    "behavioral": 5,
+}
+
+
 def infer_modality(intervention_types: List[str]) -> str:
     """Map CT.gov intervention types into editor-friendly buckets."""
-    tset = {t.upper() for t in intervention_types if isinstance(t, str)}
-
-    if any(t in tset for t in {"DRUG", "BIOLOGICAL", "GENETIC", "GENE_TRANSFER", "CELL_THERAPY"}):
-        return "drug/biologic"
-    if "DEVICE" in tset:
-        return "device"
-    if any(t in tset for t in {"PROCEDURE", "SURGERY"}):
-        return "procedure/surgery"
-    if "RADIATION" in tset:
-        return "radiation"
-    if "DIAGNOSTIC_TEST" in tset:
-        return "diagnostic"
-    if "BEHAVIORAL" in tset:
-        return "behavioral"
-    return "other"
+    best: Optional[str] = None
+    best_prio = len(_MODALITY_PRIORITY)
+    for t in intervention_types:
+        if not isinstance(t, str):
+            continue
+        m = _TYPE_TO_MODALITY.get(t.upper())
+        if m is None:
+            continue
+        p = _MODALITY_PRIORITY[m]
+        if p < best_prio:
+            best, best_prio = m, p
+            if p == 0:
+                break
+    return best or "other"
 
 
 def extract_trial_record(study: Dict[str, Any]) -> Dict[str, Any]:
     """Normalize a CT.gov study JSON object into a compact dict for scoring/storage."""
-    nct_id = get_nested(study, "protocolSection.identificationModule.nctId")
+    # Fetch each parent module once instead of re-walking from the root
+    # for every field.
+    proto = _module(study, "protocolSection")
+    ident = _module(proto, "identificationModule")
+    status = _module(proto, "statusModule")
+    design = _module(proto, "designModule")
+    oversight = _module(proto, "oversightModule")
+    org = _module(ident, "organization")
+    lead = _module(_module(proto, "sponsorCollaboratorsModule"), "leadSponsor")
+    contacts_module = _module(proto, "contactsLocationsModule")
+
+    nct_id = ident.get("nctId")
     if not nct_id:
         # some endpoints may return 'id' at top level
         nct_id = study.get("id")
 
-    brief_title = get_nested(study, "protocolSection.identificationModule.briefTitle", "")
-    official_title = get_nested(study, "protocolSection.identificationModule.officialTitle", "")
-    acronym = get_nested(study, "protocolSection.identificationModule.acronym", "")
+    brief_title = ident.get("briefTitle", "")
+    official_title = ident.get("officialTitle", "")
+    acronym = ident.get("acronym", "")
 
-    overall_status = get_nested(study, "protocolSection.statusModule.overallStatus", "")
-    study_type = get_nested(study, "protocolSection.designModule.studyType", "")
+    overall_status = status.get("overallStatus", "")
+    study_type = design.get("studyType", "")
 
-    phases = get_nested(study, "protocolSection.designModule.phases", []) or []
+    phases = design.get("phases") or []
     if not isinstance(phases, list):
         phases = [str(phases)]
 
-    enrollment = get_nested(study, "protocolSection.designModule.enrollmentInfo.count")
-    enrollment_type = get_nested(study, "protocolSection.designModule.enrollmentInfo.type", "")
-
-    lead_sponsor_name = get_nested(study, "protocolSection.sponsorCollaboratorsModule.leadSponsor.name", "") or get_nested(
-        study, "protocolSection.identificationModule.organization.fullName", ""
-    )
-    lead_sponsor_class = get_nested(study, "protocolSection.sponsorCollaboratorsModule.leadSponsor.class", "") or get_nested(
-        study, "protocolSection.identificationModule.organization.class", ""
-    )
-
-    is_fda_drug = get_nested(study, "protocolSection.oversightModule.isFdaRegulatedDrug")
-    is_fda_device = get_nested(study, "protocolSection.oversightModule.isFdaRegulatedDevice")
-    has_dmc = get_nested(study, "protocolSection.oversightModule.oversightHasDmc")
+    enrollment_info = _module(design, "enrollmentInfo")
+    enrollment = enrollment_info.get("count")
+    enrollment_type = enrollment_info.get("type", "")
 
-    # Dates
-    start_date_struct = get_nested(study, "protocolSection.statusModule.startDateStruct")
-    primary_comp_struct = get_nested(study, "protocolSection.statusModule.primaryCompletionDateStruct")
-    completion_struct = get_nested(study, "protocolSection.statusModule.completionDateStruct")
-    last_update_struct = get_nested(study, "protocolSection.statusModule.lastUpdatePostDateStruct")
-    results_first_post_struct = get_nested(study, "protocolSection.statusModule.resultsFirstPostDateStruct")
+    lead_sponsor_name = lead.get("name", "") or org.get("fullName", "")
+    lead_sponsor_class = lead.get("class", "") or org.get("class", "")
 
-    start_date = parse_partial_date(start_date_struct)
-    primary_completion_date = parse_partial_date(primary_comp_struct)
-    completion_date = parse_partial_date(completion_struct)
-    last_update_post_date = parse_partial_date(last_update_struct)
-    results_first_post_date = parse_partial_date(results_first_post_struct)
+    is_fda_drug = oversight.get("isFdaRegulatedDrug")
+    is_fda_device = oversight.get("isFdaRegulatedDevice")
+    has_dmc = oversight.get("oversightHasDmc")
 
-    primary_completion_type = None
-    if isinstance(primary_comp_struct, dict):
-        primary_completion_type = primary_comp_struct.get("type")
+    # Dates: each struct is unwrapped once for both the date and its type
+    start_date, _ = _parse_date_struct(status.get("startDateStruct"))
+    primary_completion_date, primary_completion_type = _parse_date_struct(status.get("primaryCompletionDateStruct"))
+    completion_date, completion_type = _parse_date_struct(status.get("completionDateStruct"))
+    last_update_post_date, _ = _parse_date_struct(status.get("lastUpdatePostDateStruct"))
+    results_first_post_date, _ = _parse_date_struct(status.get("resultsFirstPostDateStruct"))
 
-    completion_type = None
-    if isinstance(completion_struct, dict):
-        completion_type = completion_struct.get("type")
-
-    conditions = get_nested(study, "protocolSection.conditionsModule.conditions", []) or []
+    conditions = _module(proto, "conditionsModule").get("conditions") or []
     if not isinstance(conditions, list):
         conditions = [str(conditions)]
 
-    interventions, intervention_types = _extract_interventions(study)
+    interventions, intervention_types = _extract_interventions(_module(proto, "armsInterventionsModule"))
     modality = infer_modality(intervention_types)
 
     # Locations count (best effort)
     locs = (
-        get_nested(study, "protocolSection.contactsLocationsModule.locations")
-        or get_nested(study, "protocolSection.locationsModule.locations")
+        contacts_module.get("locations")
+        or _module(proto, "locationsModule").get("locations")
         or []
     )
     location_count = len(locs) if isinstance(locs, list) else None
 
-    contacts = _extract_contacts(study)
+    contacts = _extract_contacts(contacts_module)
 
     # Results flag exists on /studies search results; single-study endpoint might not include it.
     has_results = study.get("hasResults")
@@ -241,21 +301,37 @@ def extract_trial_record(study: Dict[str, Any]) -> Dict[str, Any]:
         "modality": modality,
         "location_count": location_count,
         "has_results": bool(has_results),
-        "start_date": start_date.raw,
-        "start_date_parsed": start_date.value.isoformat() if start_date.value else None,
-        "start_date_precision": start_date.precision,
-        "primary_completion_date": primary_completion_date.raw,
-        "primary_completion_date_parsed": primary_completion_date.value.isoformat() if primary_completion_date.value else None,
-        "primary_completion_date_precision": primary_completion_date.precision,
         "primary_completion_date_type": primary_completion_type,
-        "completion_date": completion_date.raw,
-        "completion_date_parsed": completion_date.value.isoformat() if completion_date.value else None,
-        "completion_date_precision": completion_date.precision,
         "completion_date_type": completion_type,
-        "last_update_post_date": last_update_post_date.raw,
-        "last_update_post_date_parsed": last_update_post_date.value.isoformat() if last_update_post_date.value else None,
-        "results_first_post_date": results_first_post_date.raw,
-        "results_first_post_date_parsed": results_first_post_date.value.isoformat() if results_first_post_date.value else None,
         "contacts": contacts,
     }
+
+    # Date fields emit data-driven: raw + parsed for every field,
+    # precision only where downstream consumers read it.
+    for prefix, pd, with_precision in (
+        ("start_date", start_date, True),
+        ("primary_completion_date", primary_completion_date, True),
+        ("completion_date", completion_date, True),
+        ("last_update_post_date", last_update_post_date, False),
+        ("results_first_post_date", results_first_post_date, False),
+    ):
+        record[prefix] = pd.raw
+        record[prefix + "_parsed"] = pd.value.isoformat() if pd.value else None
+        if with_precision:
+            record[prefix + "_precision"] = pd.precision
+
     return record
+
+
+def extract_trial_record_from_bytes(buf: Union[bytes, bytearray, memoryview]) -> Dict[str, Any]:
+    """Parse raw study JSON bytes and normalize in one step.
+
+    Decodes with orjson when available (it accepts memoryview without a
+    copy), so callers holding an undecoded HTTP body can skip the
+    text round trip.
+    """
+    if orjson is not None:
+        return extract_trial_record(orjson.loads(buf))
+    if isinstance(buf, memoryview):
+        buf = buf.tobytes()
+    return extract_trial_record(json.loads(buf))
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 from pathlib import Path
 from typing import Iterable, List, Optional
@@ -9,46 +11,48 @@ from .config import AppConfig, TopicConfig
 from .ctgov import CTGovClient
 from .parsing import extract_trial_record
 from .pubmed import PubMedClient
-from .report import export_table, write_digest_markdown
-from .scoring import score_trial
+from .report import export_table, export_trials_parquet, write_digest_markdown
+from .scoring import score_many
 from .storage import (
+    build_trial_payload,
     connect,
+    create_trial_indexes,
+    drop_trial_indexes,
     fetch_actionable_nct_ids,
     fetch_trials_for_digest,
     init_db,
     upsert_pubmed_citations,
-    upsert_trial,
+    upsert_trials_batch,
     update_pubmed_summary,
 )
 
 
-def _topic_text_match(record: dict, keywords: List[str]) -> bool:
-    if not keywords:
+def trials_parquet_path(db_path: Path) -> Path:
+    """Parquet sidecar written next to the SQLite DB after each sync."""
+    return db_path.with_suffix(".parquet")
+
+
+def _compile_keyword_re(keywords: List[str]) -> Optional[re.Pattern]:
+    """One case-insensitive alternation over all topic keywords."""
+    kws = [str(k) for k in keywords if str(k).strip()]
+    if not kws:
+        return None
+    return re.compile("|".join(re.escape(k) for k in kws), re.IGNORECASE)
+
+
+def _topic_text_match(record: dict, kw_re: Optional[re.Pattern]) -> bool:
+    if kw_re is None:
         return True
-    hay = " ".join(
-        [
-            str(record.get("brief_title") or ""),
-            str(record.get("official_title") or ""),
-            " ".join(record.get("conditions") or []),
-            " ".join(record.get("interventions") or []),
-        ]
-    ).lower()
-    for kw in keywords:
-        if str(kw).lower() in hay:
-            return True
-    return False
-
-
-def _get_existing_pubmed_count(conn, nct_id: str) -> int:
-    cur = conn.cursor()
-    cur.execute("SELECT pubmed_count FROM trials WHERE nct_id = ?", (nct_id,))
-    row = cur.fetchone()
-    if not row:
-        return 0
-    try:
-        return int(row[0] or 0)
-    except Exception:
-        return 0
+    # Search each component directly: no concatenated haystack to
+    # allocate, and the first hit short-circuits.
+    search = kw_re.search
+    parts = (
+        str(record.get("brief_title") or ""),
+        str(record.get("official_title") or ""),
+        *(record.get("conditions") or []),
+        *(record.get("interventions") or []),
+    )
+    return any(search(str(p)) for p in parts)
 
 
 def sync_ctgov(
@@ -62,6 +66,14 @@ def sync_ctgov(
     init_db(conn)
 
     client = CTGovClient(sleep_seconds=cfg.pipeline.ctgov_sleep_seconds)
+    today = date.today()
+
+    # Known pubmed counts, loaded once instead of one SELECT per study.
+    # Counts only change in link_pubmed, never during a sync.
+    existing_pubmed_counts = {
+        str(r[0]): int(r[1] or 0)
+        for r in conn.execute("SELECT nct_id, pubmed_count FROM trials")
+    }
 
     selected_topics: List[TopicConfig] = []
     if topic_names:
@@ -70,6 +82,13 @@ def sync_ctgov(
     else:
         selected_topics = list(cfg.topics)
 
+    # On a full re-sync most rows are touched, so maintaining secondary
+    # indexes per upsert costs more than one rebuild at the end.
+    full_sync = not topic_names and max_pages is None
+    if full_sync:
+        drop_trial_indexes(conn)
+        conn.commit()
+
     for topic in selected_topics:
         params = dict(topic.ctgov_params)
         page_size = int(params.get("pageSize") or 200)
@@ -78,39 +97,68 @@ def sync_ctgov(
         params.setdefault("format", "json")
 
         topic_max_pages = max_pages if max_pages is not None else cfg.pipeline.max_pages_per_topic
+        topic_kw_re = _compile_keyword_re(topic.tag_keywords)
 
         print(f"[sync] Topic: {topic.name} | pageSize={page_size} | max_pages={topic_max_pages}")
         count = 0
         kept = 0
-        for study in client.iter_studies(params, page_size=page_size, max_pages=topic_max_pages):
-            count += 1
-            record = extract_trial_record(study)
+        batch: List[dict] = []
+
+        def _iter_records():
+            nonlocal count
+            for study in client.iter_studies(params, page_size=page_size, max_pages=topic_max_pages):
+                count += 1
+                yield extract_trial_record(study)
+
+        # score_many resolves today and compiles the keyword scanner
+        # once per topic instead of once per study.
+        for record, scores in score_many(
+            _iter_records(),
+            interesting_keywords=topic.interesting_keywords,
+            pubmed_counts=existing_pubmed_counts,
+            today=today,
+        ):
             nct_id = record.get("nct_id")
             if not nct_id:
                 continue
 
             # Optional: apply tag keyword matching as an extra safety filter
-            if topic.tag_keywords and not _topic_text_match(record, topic.tag_keywords):
+            if topic_kw_re is not None and not _topic_text_match(record, topic_kw_re):
                 # Still keep it (because it matched the API query), but you could flip this
                 pass
 
-            existing_pubmed = _get_existing_pubmed_count(conn, str(nct_id))
-            scores = score_trial(
-                record,
-                interesting_keywords=topic.interesting_keywords,
-                pubmed_count=existing_pubmed,
-                today=date.today(),
-            )
-
             # Store without raw JSON by default to keep DB smaller.
-            upsert_trial(conn, record, topic_name=topic.name, scores=scores, raw_json=None)
+            payload = build_trial_payload(record, topic_name=topic.name, scores=scores, raw_json=None)
+            if payload is None:
+                continue
+            batch.append(payload)
             kept += 1
 
+            # Flush in batches: multi-row statements plus one commit per
+            # flush keep both statement dispatch and fsync costs amortized.
+            if len(batch) >= 500:
+                upsert_trials_batch(conn, batch)
+                conn.commit()
+                batch.clear()
+
             if kept % 200 == 0:
                 print(f"  processed {kept} trials (topic={topic.name})")
 
+        upsert_trials_batch(conn, batch)
+        conn.commit()
         print(f"[sync] Topic: {topic.name} | received={count} | stored={kept}")
 
+    if full_sync:
+        create_trial_indexes(conn)
+        conn.commit()
+
+    try:
+        export_trials_parquet(conn, trials_parquet_path(db_path))
+        print(f"[sync] Wrote {trials_parquet_path(db_path)}")
+    except Exception as e:
+        # Parquet needs pyarrow; the sync job still succeeds without it.
+        print(f"[sync] Parquet export skipped: {e}")
+
     conn.close()
     print(f"[sync] Done. DB: {db_path}")
 
@@ -125,7 +173,8 @@ def generate_digest(cfg: AppConfig, db_path: Path, out_path: Path, *, days: Opti
         readout_window_days=window_days,
         recently_completed_days=cfg.pipeline.recently_completed_days,
     )
-    # rows are sqlite3.Row; convert to dict for report helpers
+    # rows stream from SQLite in batches; one dict per row is the only
+    # full materialization (the exports below need the whole set too)
     dict_rows = [dict(r) for r in rows]
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -175,27 +224,56 @@ def link_pubmed(cfg: AppConfig, db_path: Path, *, max_trials: Optional[int] = No
         sleep_seconds=cfg.pubmed.sleep_seconds,
     )
 
-    for i, nct in enumerate(nct_ids, 1):
-        try:
-            citations = client.citations_for_nct(nct)
-        except Exception as e:
-            print(f"[pubmed] {nct}: error: {e}")
+    # Searches are network-bound and the client spaces requests globally,
+    # so a small thread pool overlaps round-trip latency without raising
+    # the request rate NCBI sees. ESearch stays per-NCT (the PMID -> NCT
+    # mapping comes from which search returned which ids); summaries are
+    # then fetched in ~200-PMID batches instead of one call per trial.
+    concurrency = max(1, int(cfg.pubmed.concurrency))
+    pmids_by_nct: dict = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(client.search_pmids_for_nct, nct): nct for nct in nct_ids}
+        for fut in as_completed(futures):
+            nct = futures[fut]
+            try:
+                pmids_by_nct[nct] = fut.result()
+            except Exception as e:
+                print(f"[pubmed] {nct}: error: {e}")
+
+    failed_pmids: set = set()
+    items = client.summaries_for_pmids(
+        [p for ps in pmids_by_nct.values() for p in ps], failed_out=failed_pmids
+    )
+
+    processed = 0
+    skipped = 0
+    for nct, pmids in pmids_by_nct.items():
+        # A trial whose PMIDs fell in a failed ESummary batch keeps its
+        # previously stored citations and counts; writing the partial
+        # (or empty) result would clobber good data with a fetch error.
+        if failed_pmids and not failed_pmids.isdisjoint(pmids):
+            skipped += 1
             continue
 
+        citations = [client.citation_from_summary(p, items[p]) for p in pmids if p in items]
         upsert_pubmed_citations(conn, nct, citations)
 
         # Summarize
         pubmed_count = len(citations)
-        latest = None
         # pub_date strings are not guaranteed ISO; keep the latest lexicographically as a weak heuristic
-        pub_dates = [c.get("pub_date") for c in citations if c.get("pub_date")]
-        if pub_dates:
-            latest = sorted([str(x) for x in pub_dates])[-1]
+        latest = max((str(c["pub_date"]) for c in citations if c.get("pub_date")), default=None)
 
         update_pubmed_summary(conn, nct, pubmed_count=pubmed_count, pubmed_latest_date=latest)
 
-        if i % 25 == 0:
-            print(f"[pubmed] processed {i}/{len(nct_ids)}")
+        processed += 1
+        if processed % 100 == 0:
+            conn.commit()
+
+        if processed % 25 == 0:
+            print(f"[pubmed] processed {processed}/{len(nct_ids)}")
 
+    conn.commit()
     conn.close()
+    if skipped:
+        print(f"[pubmed] skipped {skipped} trials whose summaries failed to fetch; previous data kept")
     print("[pubmed] Done.")
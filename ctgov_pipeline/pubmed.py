@@ -1,15 +1,39 @@
 from __future__ import annotations
 
+import json
+import re
+import threading
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
+
+
+def _loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# DOIs as they appear in elocationid strings like 'doi: 10.1000/xyz123'.
+_DOI_RE = re.compile(r"10\.\d{4,9}/\S+")
 
 
 @dataclass
 class PubMedClient:
-    """Small PubMed E-utilities client for linking NCT IDs to PMIDs."""
+    """Small PubMed E-utilities client for linking NCT IDs to PMIDs.
+
+    Safe to share across worker threads: requests are spaced globally by
+    sleep_seconds, so concurrency does not raise the request rate NCBI
+    sees.
+    """
 
     tool: str
     email: str
@@ -20,8 +44,36 @@ class PubMedClient:
     def __post_init__(self) -> None:
         self._session = requests.Session()
         self._session.headers.update({"User-Agent": f"{self.tool} (mailto:{self.email})" if self.email else self.tool})
+        # Pool sized for the worker threads; retries absorb NCBI's
+        # transient 429/5xx responses with exponential backoff.
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+            ),
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+
+    def _throttle(self) -> None:
+        """Block until this thread may send, keeping the global spacing."""
+        if not self.sleep_seconds:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.sleep_seconds
+        if wait > 0:
+            time.sleep(wait)
 
     def _get(self, endpoint: str, params: Dict[str, Any]) -> requests.Response:
+        self._throttle()
         url = self.base_url.rstrip("/") + "/" + endpoint.lstrip("/")
         return self._session.get(url, params=params, timeout=self.timeout_seconds)
 
@@ -42,10 +94,8 @@ class PubMedClient:
         resp = self._get("esearch.fcgi", params=params)
         if resp.status_code != 200:
             raise RuntimeError(f"PubMed ESearch error {resp.status_code}: {resp.text[:500]}")
-        data = resp.json()
+        data = _loads(resp.content)
         ids = data.get("esearchresult", {}).get("idlist", []) or []
-        if self.sleep_seconds:
-            time.sleep(self.sleep_seconds)
         return [str(x) for x in ids]
 
     def summary(self, pmids: List[str]) -> Dict[str, Any]:
@@ -62,40 +112,81 @@ class PubMedClient:
         resp = self._get("esummary.fcgi", params=params)
         if resp.status_code != 200:
             raise RuntimeError(f"PubMed ESummary error {resp.status_code}: {resp.text[:500]}")
-        data = resp.json()
-        if self.sleep_seconds:
-            time.sleep(self.sleep_seconds)
-        return data
+        return _loads(resp.content)
+
+    @staticmethod
+    def citation_from_summary(pmid: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        # articleids is the structured source, like [{'idtype':'doi','value':'...'}];
+        # elocationid (often 'doi: ...') is only a fallback, parsed with one regex.
+        doi = None
+        for aid in item.get("articleids", []) or []:
+            if isinstance(aid, dict) and aid.get("idtype") == "doi":
+                doi = aid.get("value")
+                break
+        if not doi:
+            eloc = item.get("elocationid")
+            if isinstance(eloc, str):
+                m = _DOI_RE.search(eloc)
+                if m:
+                    doi = m.group(0)
+
+        return {
+            "pmid": str(pmid),
+            "title": item.get("title"),
+            "source": item.get("fulljournalname") or item.get("source"),
+            "pub_date": item.get("pubdate"),
+            "doi": doi,
+        }
+
+    def summaries_for_pmids(
+        self,
+        pmids: List[str],
+        *,
+        chunk_size: int = 200,
+        failed_out: Optional[Set[str]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch ESummary records for many PMIDs in ~200-id batches.
+
+        A batch that still fails after retries is skipped, not raised:
+        one bad chunk should cost its ~200 PMIDs, not the whole run's
+        completed search work. The skipped PMIDs are added to failed_out
+        (when given) so callers can tell "fetch failed" apart from "no
+        summary exists" and leave previously stored data alone.
+        """
+        out: Dict[str, Dict[str, Any]] = {}
+        uniq = list(dict.fromkeys(str(p) for p in pmids))
+        for i in range(0, len(uniq), chunk_size):
+            chunk = uniq[i : i + chunk_size]
+            try:
+                result = self.summary(chunk).get("result", {}) or {}
+            except Exception as e:
+                print(f"[pubmed] ESummary batch failed ({e}); skipping {len(chunk)} PMIDs")
+                if failed_out is not None:
+                    failed_out.update(chunk)
+                continue
+            for pmid in result.get("uids", []) or []:
+                item = result.get(str(pmid))
+                if isinstance(item, dict):
+                    out[str(pmid)] = item
+        return out
 
     def citations_for_nct(self, nct_id: str, *, retmax: int = 200) -> List[Dict[str, Any]]:
         pmids = self.search_pmids_for_nct(nct_id, retmax=retmax)
         if not pmids:
             return []
-        summ = self.summary(pmids)
-        result = summ.get("result", {}) or {}
-        out: List[Dict[str, Any]] = []
-        for pmid in pmids:
-            item = result.get(str(pmid))
-            if not isinstance(item, dict):
-                continue
-            # DOI can appear in elocationid (often 'doi: ...') or articleids list
-            doi = None
-            eloc = item.get("elocationid")
-            if isinstance(eloc, str) and "doi" in eloc.lower():
-                doi = eloc.replace("doi:", "").strip()
-            # articleids sometimes is like [{'idtype':'doi','value':'...'}]
-            for aid in item.get("articleids", []) or []:
-                if isinstance(aid, dict) and aid.get("idtype") == "doi":
-                    doi = aid.get("value")
-                    break
-
-            out.append(
-                {
-                    "pmid": str(pmid),
-                    "title": item.get("title"),
-                    "source": item.get("fulljournalname") or item.get("source"),
-                    "pub_date": item.get("pubdate"),
-                    "doi": doi,
-                }
-            )
-        return out
+        items = self.summaries_for_pmids(pmids)
+        return [self.citation_from_summary(p, items[p]) for p in pmids if p in items]
+
+    def citations_for_ncts(self, nct_ids: List[str], *, retmax: int = 200) -> Dict[str, List[Dict[str, Any]]]:
+        """Map each NCT id to its citations with batched ESummary calls.
+
+        ESearch stays per-NCT because the PMID -> NCT mapping comes from
+        which search returned which ids; ESummary is then one request per
+        ~200 PMIDs across all trials instead of one per trial.
+        """
+        pmids_by_nct = {n: self.search_pmids_for_nct(n, retmax=retmax) for n in nct_ids}
+        items = self.summaries_for_pmids([p for ps in pmids_by_nct.values() for p in ps])
+        return {
+            n: [self.citation_from_summary(p, items[p]) for p in ps if p in items]
+            for n, ps in pmids_by_nct.items()
+        }
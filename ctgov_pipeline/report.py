@@ -7,6 +7,11 @@ from typing import Any, Dict, Iterable, List
 
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
+
 
 def _loads(x: Any, default: Any) -> Any:
     if x is None:
@@ -16,7 +21,7 @@ def _loads(x: Any, default: Any) -> Any:
     if not isinstance(x, str):
         return default
     try:
-        return json.loads(x)
+        return orjson.loads(x) if orjson is not None else json.loads(x)
     except Exception:
         return default
 
@@ -41,13 +46,6 @@ def _first_email(contacts_json: Any) -> str | None:
 
 def write_digest_markdown(rows: Iterable[Dict[str, Any]], out_path: Path) -> None:
     rows = list(rows)
-    lines: List[str] = []
-    lines.append(f"# CT.gov Trial Watch Digest")
-    lines.append("")
-    lines.append(f"_Generated: {_utcnow()}_")
-    lines.append("")
-    lines.append(f"Total actionable trials: **{len(rows)}**")
-    lines.append("")
     # group by topic tag
     by_topic: Dict[str, List[Dict[str, Any]]] = {}
     for r in rows:
@@ -60,65 +58,85 @@ def write_digest_markdown(rows: Iterable[Dict[str, Any]], out_path: Path) -> Non
     # stable ordering: alphabetical, but move untagged to end
     topic_names = sorted([t for t in by_topic.keys() if t != "(untagged)"]) + (["(untagged)"] if "(untagged)" in by_topic else [])
 
-    for topic in topic_names:
-        trs = sorted(by_topic[topic], key=lambda x: (-(x.get("total_score") or 0), x.get("primary_completion_date_parsed") or "9999-12-31"))
-        lines.append(f"## {topic}")
-        lines.append("")
-        for r in trs[:25]:
-            nct = r.get("nct_id")
-            if not nct:
-                continue
-            title = (r.get("brief_title") or "").strip()
-            phase = r.get("phase") or ""
-            modality = r.get("modality") or ""
-            sponsor = (r.get("lead_sponsor_name") or "").strip()
-            status = (r.get("overall_status") or "").strip()
-            pc = r.get("primary_completion_date") or r.get("primary_completion_date_parsed") or ""
-            d2 = r.get("days_to_primary_completion")
-            has_results = bool(r.get("has_results"))
-            pubmed_count = r.get("pubmed_count") or 0
-            score = r.get("total_score") or 0
-            email = _first_email(r.get("contacts_json"))
-            url = trial_url(str(nct))
-
-            lines.append(f"### {nct}: {title}")
-            lines.append("")
-            lines.append(f"- **Total score:** {score}  |  **Phase:** {phase}  |  **Modality:** {modality}")
-            lines.append(f"- **Sponsor:** {sponsor}")
-            lines.append(f"- **Status:** {status}")
-            lines.append(f"- **Primary completion:** {pc}  |  **Days to readout:** {d2}")
-            lines.append(f"- **CT.gov results posted:** {'Yes' if has_results else 'No'}  |  **PubMed papers:** {pubmed_count}")
-            if email:
-                lines.append(f"- **Central contact email:** {email}")
-            lines.append(f"- **Link:** {url}")
-            # short reasons
-            reasons = _loads(r.get("score_reasons_json"), {})
-            if isinstance(reasons, dict):
-                urg = reasons.get("urgency") or []
-                maj = reasons.get("major") or []
-                lines.append(f"- **Why flagged:** {', '.join([str(x) for x in (urg[:2] + maj[:2]) if x])}")
-            lines.append("")
-
-    out_path.write_text("\n".join(lines), encoding="utf-8")
+    # Stream straight to the file: the working set stays one line, not
+    # the whole digest plus its joined copy.
+    with open(out_path, "w", encoding="utf-8", buffering=1 << 16) as f:
+        write = f.write
+        write(f"# CT.gov Trial Watch Digest\n\n")
+        write(f"_Generated: {_utcnow()}_\n\n")
+        write(f"Total actionable trials: **{len(rows)}**\n\n")
+
+        for topic in topic_names:
+            trs = sorted(by_topic[topic], key=lambda x: (-(x.get("total_score") or 0), x.get("primary_completion_date_parsed") or "9999-12-31"))
+            write(f"## {topic}\n\n")
+            for r in trs[:25]:
+                nct = r.get("nct_id")
+                if not nct:
+                    continue
+                title = (r.get("brief_title") or "").strip()
+                phase = r.get("phase") or ""
+                modality = r.get("modality") or ""
+                sponsor = (r.get("lead_sponsor_name") or "").strip()
+                status = (r.get("overall_status") or "").strip()
+                pc = r.get("primary_completion_date") or r.get("primary_completion_date_parsed") or ""
+                d2 = r.get("days_to_primary_completion")
+                has_results = bool(r.get("has_results"))
+                pubmed_count = r.get("pubmed_count") or 0
+                score = r.get("total_score") or 0
+                email = _first_email(r.get("contacts_json"))
+                url = trial_url(str(nct))
+
+                write(f"### {nct}: {title}\n\n")
+                write(f"- **Total score:** {score}  |  **Phase:** {phase}  |  **Modality:** {modality}\n")
+                write(f"- **Sponsor:** {sponsor}\n")
+                write(f"- **Status:** {status}\n")
+                write(f"- **Primary completion:** {pc}  |  **Days to readout:** {d2}\n")
+                write(f"- **CT.gov results posted:** {'Yes' if has_results else 'No'}  |  **PubMed papers:** {pubmed_count}\n")
+                if email:
+                    write(f"- **Central contact email:** {email}\n")
+                write(f"- **Link:** {url}\n")
+                # short reasons
+                reasons = _loads(r.get("score_reasons_json"), {})
+                if isinstance(reasons, dict):
+                    urg = reasons.get("urgency") or []
+                    maj = reasons.get("major") or []
+                    write(f"- **Why flagged:** {', '.join([str(x) for x in (urg[:2] + maj[:2]) if x])}\n")
+                write("\n")
+
+
+def export_trials_parquet(conn: Any, out_path: Path) -> None:
+    """Materialize the trials table (minus raw_json) as a Parquet sidecar.
+
+    The dashboard prefers this file when it is newer than the SQLite DB:
+    a columnar read is much faster than re-querying and re-decoding the
+    table on a cold start.
+    """
+
+    cols = [r[1] for r in conn.execute("PRAGMA table_info(trials)") if r[1] != "raw_json"]
+    if not cols:
+        return
+    df = pd.read_sql_query(f"SELECT {', '.join(cols)} FROM trials", conn)
+    df.to_parquet(out_path, compression="zstd")
+
+
+def _join_json_list(x: Any) -> str:
+    xs = _loads(x, [])
+    return ", ".join(str(v) for v in xs) if isinstance(xs, list) else ""
 
 
 def export_table(rows: Iterable[Dict[str, Any]], *, csv_path: Path | None = None, xlsx_path: Path | None = None) -> None:
     rows = list(rows)
     if not rows:
         return
-    # Flatten JSON columns we care about
-    flat: List[Dict[str, Any]] = []
-    for r in rows:
-        item = dict(r)
-        item["conditions"] = ", ".join(_loads(item.get("conditions_json"), []))
-        item["interventions"] = ", ".join(_loads(item.get("interventions_json"), []))
-        item["intervention_types"] = ", ".join(_loads(item.get("intervention_types_json"), []))
-        item["topic_tags"] = ", ".join(_loads(item.get("topic_tags_json"), []))
-        item["contact_email"] = _first_email(item.get("contacts_json")) or ""
-        item["ctgov_url"] = trial_url(item.get("nct_id"))
-        flat.append(item)
-
-    df = pd.DataFrame(flat)
+    # Build the frame once and flatten the JSON columns columnwise;
+    # one .map per column instead of a dict copy per row.
+    df = pd.DataFrame(rows)
+    for json_col in ("conditions_json", "interventions_json", "intervention_types_json", "topic_tags_json"):
+        if json_col in df.columns:
+            df[json_col.removesuffix("_json")] = df[json_col].map(_join_json_list)
+    if "contacts_json" in df.columns:
+        df["contact_email"] = df["contacts_json"].map(lambda x: _first_email(x) or "")
+    df["ctgov_url"] = "https://clinicaltrials.gov/study/" + df["nct_id"].astype(str)
     # Put the most useful columns first
     preferred = [
         "nct_id",
@@ -145,6 +163,14 @@ def export_table(rows: Iterable[Dict[str, Any]], *, csv_path: Path | None = None
     df = df[cols]
 
     if csv_path:
-        df.to_csv(csv_path, index=False)
+        df.to_csv(csv_path, index=False, chunksize=50_000)
     if xlsx_path:
-        df.to_excel(xlsx_path, index=False)
+        try:
+            # xlsxwriter writes the sheet far faster than openpyxl, which
+            # stays as the fallback. Its constant_memory mode is NOT safe
+            # here: pandas emits cells column-major, and constant_memory
+            # flushes each row as soon as a later row is written, which
+            # silently drops every column after the first.
+            df.to_excel(xlsx_path, index=False, engine="xlsxwriter")
+        except ImportError:
+            df.to_excel(xlsx_path, index=False)
@@ -1,41 +1,79 @@
 from __future__ import annotations
 
+import functools
+import re
+from bisect import bisect_right
 from dataclasses import dataclass
-from datetime import date, datetime
-from typing import Any, Dict, List, Tuple
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+try:
+    import ahocorasick
+except ImportError:  # optional; the plain substring loop is the fallback
+    ahocorasick = None
 
-def _parse_iso_date(s: Any) -> date | None:
-    if not s or not isinstance(s, str):
-        return None
+
+# A reason is either a finished string or a (template, *args) tuple the
+# scorers leave unformatted; render_reason materializes it at output
+# time so ranking-only callers never pay for the f-string work.
+Reason = Any
+
+
+def render_reason(reason: Reason) -> str:
+    if isinstance(reason, str):
+        return reason
+    template, *args = reason
+    return template.format(*args)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso_date_cached(s: str) -> date | None:
+    # date.fromisoformat skips the datetime intermediate; many trials in
+    # a batch share the same completion date string, hence the cache.
     try:
-        return datetime.fromisoformat(s).date()
+        return date.fromisoformat(s)
     except Exception:
         return None
 
 
+def _parse_iso_date(s: Any) -> date | None:
+    if not s or not isinstance(s, str):
+        return None
+    return _parse_iso_date_cached(s)
+
+
+# Most-advanced phase wins; tokens outside this map (NA, UNKNOWN, ...)
+# rank below all of them.
+_PHASE_PRIO = {
+    "PHASE4": 5,
+    "PHASE3": 4,
+    "PHASE2": 3,
+    "PHASE1": 2,
+    "EARLY_PHASE1": 1,
+}
+_PRIO_PHASE = {v: k for k, v in _PHASE_PRIO.items()}
+
+
 def _normalize_phase(phases: List[str]) -> str:
     # CT.gov uses values like PHASE1, PHASE2, PHASE3, PHASE4, EARLY_PHASE1, NA, etc.
     if not phases:
         return "UNKNOWN"
-    p = [str(x).upper() for x in phases if x]
-    # Prefer the highest/most-advanced phase if multiple.
-    order = [
-        "PHASE4",
-        "PHASE3",
-        "PHASE2",
-        "PHASE1",
-        "EARLY_PHASE1",
-    ]
-    for o in order:
-        if o in p:
-            return o
-    # handle combined strings like PHASE2/PHASE3
-    joined = ",".join(p)
-    for o in order:
-        if o in joined:
-            return o
-    return p[0]
+    best = 0
+    first = None
+    for x in phases:
+        if not x:
+            continue
+        up = str(x).upper()
+        if first is None:
+            first = up
+        # combined strings like PHASE2/PHASE3 rank by their best token
+        for tok in up.split("/"):
+            prio = _PHASE_PRIO.get(tok, 0)
+            if prio > best:
+                best = prio
+    if best:
+        return _PRIO_PHASE[best]
+    return first if first is not None else "UNKNOWN"
 
 
 def score_urgency(
@@ -44,12 +82,13 @@ def score_urgency(
     has_results: bool,
     pubmed_count: int = 0,
     today: date | None = None,
-) -> Tuple[int, List[str], int | None]:
+) -> Tuple[int, List[Reason], int | None]:
     """Score how urgent a trial is for commissioning.
 
-    Returns (score_0_100, reasons, days_to_primary_completion).
+    Returns (score_0_100, reasons, days_to_primary_completion); reasons
+    are deferred (template, *args) tuples -- see render_reason.
     """
-    reasons: List[str] = []
+    reasons: List[Reason] = []
     today = today or date.today()
     d = _parse_iso_date(primary_completion_date_iso)
     if not d:
@@ -60,13 +99,13 @@ def score_urgency(
     # "Soon" window (0..180): closer = higher
     if 0 <= delta_days <= 180:
         score = int(100 - (delta_days / 180) * 80)  # 100 -> 20
-        reasons.append(f"Primary completion in {delta_days} days")
+        reasons.append(("Primary completion in {} days", delta_days))
         return max(0, min(100, score)), reasons, delta_days
 
     # Recently completed (past 180 days): prioritize if no results/papers
     if -180 <= delta_days < 0:
         score = int(70 - (abs(delta_days) / 180) * 40)  # 70 -> 30
-        reasons.append(f"Primary completion {abs(delta_days)} days ago")
+        reasons.append(("Primary completion {} days ago", abs(delta_days)))
         if not has_results:
             score += 15
             reasons.append("No posted results on CT.gov")
@@ -77,8 +116,46 @@ def score_urgency(
 
     # Far future or long-past: low urgency
     if delta_days > 180:
-        return 0, [f"Primary completion is >180 days away ({delta_days} days)"], delta_days
-    return 0, [f"Primary completion is >180 days ago ({abs(delta_days)} days ago)"], delta_days
+        return 0, [("Primary completion is >180 days away ({} days)", delta_days)], delta_days
+    return 0, [("Primary completion is >180 days ago ({} days ago)", abs(delta_days))], delta_days
+
+
+# Enrollment buckets: bisect_right over the thresholds picks the score
+# and reason in one binary search instead of a six-arm branch chain.
+_ENROLL_THRESHOLDS = (100, 200, 500, 1000, 2000)
+_ENROLL_SCORES = (5, 12, 18, 25, 30, 35)
+_ENROLL_LABELS = (
+    "Small enrollment (n={})",
+    "Enrollment (n={})",
+    "Moderate enrollment (n={})",
+    "Moderate-large enrollment (n={})",
+    "Large enrollment (n={})",
+    "Large enrollment (n={})",
+)
+
+# Known sponsor-class / study-type values map straight to (points, reason).
+# CT.gov sends these enums already uppercased, so the lookup is tried on
+# the raw string first and normalization only runs on a miss.
+_SPONSOR_SCORES = {
+    "INDUSTRY": (20, "Industry-sponsored"),
+    "NIH": (18, "NIH-sponsored"),
+}
+_STUDY_TYPE_SCORES = {
+    "INTERVENTIONAL": (8, "Interventional study"),
+}
+
+
+def _lookup_enum(value: str | None, table: Dict[str, Tuple[int, str]]) -> Tuple[str, Optional[Tuple[int, str]]]:
+    """Resolve an enum-ish string against a score table.
+
+    Returns (normalized_value, table_entry_or_None), normalizing only
+    when the raw string is not already a canonical key."""
+    s = value or ""
+    entry = table.get(s)
+    if entry is None and s:
+        s = s.upper().strip()
+        entry = table.get(s)
+    return s, entry
 
 
 def score_major(
@@ -90,14 +167,14 @@ def score_major(
     oversight_has_dmc: bool | None,
     is_fda_regulated_drug: bool | None,
     is_fda_regulated_device: bool | None,
-) -> Tuple[int, List[str]]:
-    reasons: List[str] = []
+) -> Tuple[int, List[Reason]]:
+    reasons: List[Reason] = []
     score = 0
 
     phase_norm = _normalize_phase(phases)
     if phase_norm in {"PHASE3", "PHASE4"}:
         score += 40
-        reasons.append(f"Phase {phase_norm.replace('PHASE', '')}")
+        reasons.append(("Phase {}", phase_norm.replace("PHASE", "")))
     elif phase_norm == "PHASE2":
         score += 25
         reasons.append("Phase 2")
@@ -106,58 +183,43 @@ def score_major(
         reasons.append("Phase 1")
     else:
         score += 5
-        reasons.append(f"Phase: {phase_norm}")
+        reasons.append(("Phase: {}", phase_norm))
 
     # Enrollment (size)
-    try:
-        n = int(enrollment) if enrollment is not None else None
-    except Exception:
-        n = None
+    if isinstance(enrollment, int):
+        n = enrollment
+    else:
+        try:
+            n = int(enrollment) if enrollment is not None else None
+        except Exception:
+            n = None
 
     if n is not None:
-        if n >= 2000:
-            score += 35
-            reasons.append(f"Large enrollment (n={n})")
-        elif n >= 1000:
-            score += 30
-            reasons.append(f"Large enrollment (n={n})")
-        elif n >= 500:
-            score += 25
-            reasons.append(f"Moderate-large enrollment (n={n})")
-        elif n >= 200:
-            score += 18
-            reasons.append(f"Moderate enrollment (n={n})")
-        elif n >= 100:
-            score += 12
-            reasons.append(f"Enrollment (n={n})")
-        else:
-            score += 5
-            reasons.append(f"Small enrollment (n={n})")
+        idx = bisect_right(_ENROLL_THRESHOLDS, n)
+        score += _ENROLL_SCORES[idx]
+        reasons.append((_ENROLL_LABELS[idx], n))
     else:
         reasons.append("Enrollment unknown")
 
     # Sponsor class
-    sc = (sponsor_class or "").upper().strip()
-    if sc == "INDUSTRY":
-        score += 20
-        reasons.append("Industry-sponsored")
-    elif sc == "NIH":
-        score += 18
-        reasons.append("NIH-sponsored")
+    sc, entry = _lookup_enum(sponsor_class, _SPONSOR_SCORES)
+    if entry is not None:
+        score += entry[0]
+        reasons.append(entry[1])
     elif sc:
         score += 10
-        reasons.append(f"Sponsor class: {sc}")
+        reasons.append(("Sponsor class: {}", sc))
     else:
         score += 5
         reasons.append("Sponsor class unknown")
 
-    st = (study_type or "").upper().strip()
-    if st == "INTERVENTIONAL":
-        score += 8
-        reasons.append("Interventional study")
+    st, entry = _lookup_enum(study_type, _STUDY_TYPE_SCORES)
+    if entry is not None:
+        score += entry[0]
+        reasons.append(entry[1])
     elif st:
         score += 3
-        reasons.append(f"Study type: {st}")
+        reasons.append(("Study type: {}", st))
 
     if oversight_has_dmc is True:
         score += 5
@@ -191,33 +253,115 @@ DEFAULT_INTEREST_KEYWORDS = [
 ]
 
 
+# Default keywords flattened once at import; per-record calls with no
+# config keywords reuse this tuple as-is.
+_DEFAULT_KWS: Tuple[Tuple[str, int, str], ...] = tuple(
+    (kw, w, "Signal term") for kw, w in DEFAULT_INTEREST_KEYWORDS
+)
+
+
+def _normalized_keywords(
+    interesting_keywords: List[Dict[str, Any]] | None,
+) -> Tuple[Tuple[str, int, str], ...]:
+    """Flatten config + default keywords into (keyword, weight, label) tuples."""
+    if not interesting_keywords:
+        return _DEFAULT_KWS
+    out: List[Tuple[str, int, str]] = []
+    for item in interesting_keywords:
+        if not isinstance(item, dict):
+            continue
+        kw = str(item.get("keyword", "")).strip()
+        if not kw:
+            continue
+        out.append((kw, int(item.get("weight", 5)), "Keyword match"))
+    out.extend(_DEFAULT_KWS)
+    return tuple(out)
+
+
+def _entries_by_key(
+    kws: Tuple[Tuple[str, int, str], ...],
+) -> Dict[str, Tuple[Tuple[str, int, str], ...]]:
+    """Group entries by lowercased keyword, keeping every entry.
+
+    A keyword listed in both the config and the defaults scores both
+    weights with both reasons, matching the per-entry substring loop
+    this replaced -- a dict keyed by keyword alone would silently drop
+    one of them."""
+    grouped: Dict[str, List[Tuple[str, int, str]]] = {}
+    for kw, w, label in kws:
+        grouped.setdefault(kw.lower(), []).append((kw, w, label))
+    return {k: tuple(v) for k, v in grouped.items()}
+
+
+@functools.lru_cache(maxsize=32)
+def _keyword_regex(
+    kws: Tuple[Tuple[str, int, str], ...],
+) -> Optional[Tuple[re.Pattern, Dict[str, Tuple[Tuple[str, int, str], ...]]]]:
+    """Single alternation over all keywords plus a lookup from lowercased
+    hit back to its (keyword, weight, label) entries; used when
+    pyahocorasick is not installed -- one regex pass instead of one
+    substring scan per keyword."""
+    if not kws:
+        return None
+    pattern = re.compile("|".join(re.escape(kw.lower()) for kw, _, _ in kws))
+    return pattern, _entries_by_key(kws)
+
+
+@functools.lru_cache(maxsize=32)
+def _keyword_automaton(kws: Tuple[Tuple[str, int, str], ...]) -> Optional[Any]:
+    """One Aho-Corasick automaton per keyword set: a single linear scan
+    of the text finds every keyword instead of one substring pass each."""
+    if ahocorasick is None or not kws:
+        return None
+    a = ahocorasick.Automaton(ahocorasick.STORE_ANY, ahocorasick.KEY_STRING)
+    for key, entries in _entries_by_key(kws).items():
+        a.add_word(key, (key, entries))
+    a.make_automaton()
+    return a
+
+
 def score_interesting(
-    record_text: str,
+    text_lower: str,
     interesting_keywords: List[Dict[str, Any]] | None = None,
-) -> Tuple[int, List[str]]:
-    """Keyword-driven interest score (configurable)."""
-    reasons: List[str] = []
+    *,
+    _kws: Tuple[Tuple[str, int, str], ...] | None = None,
+) -> Tuple[int, List[Reason]]:
+    """Keyword-driven interest score (configurable).
+
+    Callers pass already-lowercased text so the copy happens once per
+    record no matter how many scorers scan it. Batch callers may pass
+    the pre-normalized keyword tuple via _kws to skip per-record
+    normalization.
+    """
+    reasons: List[Reason] = []
     score = 0
-    text = record_text.lower()
-
-    # topic-specific keywords from config
-    if interesting_keywords:
-        for item in interesting_keywords:
-            if not isinstance(item, dict):
-                continue
-            kw = str(item.get("keyword", "")).strip()
-            if not kw:
+    text = text_lower
+
+    kws = _kws if _kws is not None else _normalized_keywords(interesting_keywords)
+    automaton = _keyword_automaton(kws)
+    if automaton is not None:
+        seen = set()
+        for _, (key, entries) in automaton.iter(text):
+            if key in seen:  # count each keyword once
                 continue
-            w = int(item.get("weight", 5))
-            if kw.lower() in text:
+            seen.add(key)
+            for kw, w, label in entries:
                 score += w
-                reasons.append(f"Keyword match: {kw} (+{w})")
-
-    # generic keywords
-    for kw, w in DEFAULT_INTEREST_KEYWORDS:
-        if kw.lower() in text:
-            score += w
-            reasons.append(f"Signal term: {kw} (+{w})")
+                reasons.append(("{}: {} (+{})", label, kw, w))
+    else:
+        compiled = _keyword_regex(kws)
+        # The alternation is only a prefilter: one regex pass answers
+        # "any keyword at all?", and most records answer no. findall on
+        # it would miss keywords contained in or overlapping another
+        # (e.g. "gene" vs "gene therapy"), so on a hit we fall back to
+        # per-keyword substring tests, which the automaton path and the
+        # baseline loop both match.
+        if compiled is not None and compiled[0].search(text) is not None:
+            for key, entries in compiled[1].items():
+                if key in text:
+                    for kw, w, label in entries:
+                        score += w
+                        reasons.append(("{}: {} (+{})", label, kw, w))
 
     # cap and normalize
     score = max(0, min(100, score))
@@ -226,6 +370,16 @@ def score_interesting(
     return score, reasons
 
 
+def _iter_text_fields(record: Dict[str, Any]):
+    """Yield the text fields keyword scoring scans, without intermediate joins."""
+    yield str(record.get("brief_title") or "")
+    yield str(record.get("official_title") or "")
+    for c in record.get("conditions") or ():
+        yield str(c)
+    for i in record.get("interventions") or ():
+        yield str(i)
+
+
 def total_score(major: int, urgency: int, interesting: int) -> int:
     # Weighted toward 'major' + 'urgency' for commissioning workflow
     return int(round(0.4 * major + 0.4 * urgency + 0.2 * interesting))
@@ -237,6 +391,7 @@ def score_trial(
     interesting_keywords: List[Dict[str, Any]] | None = None,
     pubmed_count: int = 0,
     today: date | None = None,
+    _kws: Tuple[Tuple[str, int, str], ...] | None = None,
 ) -> Dict[str, Any]:
     """Compute all scores and reasons for a normalized trial record."""
     today = today or date.today()
@@ -256,15 +411,8 @@ def score_trial(
         is_fda_regulated_device=record.get("is_fda_regulated_device"),
     )
 
-    record_text = " ".join(
-        [
-            str(record.get("brief_title", "")),
-            str(record.get("official_title", "")),
-            " ".join(record.get("conditions") or []),
-            " ".join(record.get("interventions") or []),
-        ]
-    )
-    interesting, int_reasons = score_interesting(record_text, interesting_keywords=interesting_keywords)
+    text_lower = " ".join(_iter_text_fields(record)).lower()
+    interesting, int_reasons = score_interesting(text_lower, interesting_keywords=interesting_keywords, _kws=_kws)
 
     total = total_score(major, urgency, interesting)
 
@@ -274,9 +422,39 @@ def score_trial(
         "interesting": interesting,
         "total": total,
         "days_to_primary_completion": days_to_pc,
+        # Rendered here, at the output boundary; the scorers themselves
+        # only build (template, *args) tuples.
         "reasons": {
-            "urgency": urg_reasons,
-            "major": major_reasons,
-            "interesting": int_reasons,
+            "urgency": [render_reason(r) for r in urg_reasons],
+            "major": [render_reason(r) for r in major_reasons],
+            "interesting": [render_reason(r) for r in int_reasons],
         },
     }
+
+
+def score_many(
+    records: Iterable[Dict[str, Any]],
+    *,
+    interesting_keywords: List[Dict[str, Any]] | None = None,
+    pubmed_counts: Dict[str, int] | None = None,
+    today: date | None = None,
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Yield (record, scores) for a batch, hoisting batch-invariant setup.
+
+    Resolves today once and warms the keyword automaton/regex caches
+    before the loop, so the per-record path does no date syscalls or
+    keyword compilation.
+    """
+    today = today or date.today()
+    pubmed_counts = pubmed_counts or {}
+    kws = _normalized_keywords(interesting_keywords)
+    _keyword_automaton(kws)
+    _keyword_regex(kws)
+    for record in records:
+        yield record, score_trial(
+            record,
+            interesting_keywords=interesting_keywords,
+            pubmed_count=pubmed_counts.get(str(record.get("nct_id")), 0),
+            today=today,
+            _kws=kws,
+        )
@@ -4,7 +4,12 @@ import json
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
 
 
 def utcnow_iso() -> str:
@@ -12,8 +17,18 @@ def utcnow_iso() -> str:
 
 
 def connect(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(db_path))
+    # A larger statement cache keeps the multi-row upsert statements
+    # prepared across batch flushes.
+    conn = sqlite3.connect(str(db_path), cached_statements=256)
     conn.row_factory = sqlite3.Row
+    # Ingest-friendly defaults: WAL lets readers proceed during a sync,
+    # and NORMAL durability is sufficient for data we can re-fetch from
+    # the API. Cache/mmap sizes keep hot pages out of syscalls.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA mmap_size=268435456")
     return conn
 
 
@@ -78,14 +93,34 @@ def init_db(conn: sqlite3.Connection) -> None:
         """
     )
 
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_trials_total_score ON trials(total_score DESC)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_trials_primary_completion ON trials(primary_completion_date_parsed)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_trials_last_update ON trials(last_update_post_date_parsed)")
+    create_trial_indexes(conn)
     conn.commit()
 
 
+# Secondary indexes on trials; dropped during full syncs so bulk
+# upserts maintain only the primary key B-tree.
+_TRIAL_INDEXES = (
+    ("idx_trials_total_score", "trials(total_score DESC)"),
+    ("idx_trials_primary_completion", "trials(primary_completion_date_parsed)"),
+    ("idx_trials_last_update", "trials(last_update_post_date_parsed)"),
+    ("idx_trials_actionable", "trials(days_to_primary_completion, total_score DESC)"),
+)
+
+
+def create_trial_indexes(conn: sqlite3.Connection) -> None:
+    for name, spec in _TRIAL_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {spec}")
+
+
+def drop_trial_indexes(conn: sqlite3.Connection) -> None:
+    for name, _ in _TRIAL_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
 def _json(obj: Any) -> str:
-    return json.dumps(obj, ensure_ascii=False, sort_keys=False, default=str)
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=str).decode()
+    return json.dumps(obj, ensure_ascii=False, default=str)
 
 
 def _safe_int(x: Any) -> Optional[int]:
@@ -97,85 +132,189 @@ def _safe_int(x: Any) -> Optional[int]:
         return None
 
 
-def upsert_trial(
-    conn: sqlite3.Connection,
+# Field tables for build_trial_payload: column -> record/scores key,
+# grouped by how the value is coerced. Built once so the per-trial path
+# is a few flat loops instead of thirty inline expressions.
+_PAYLOAD_PASSTHROUGH = (
+    "brief_title",
+    "official_title",
+    "acronym",
+    "overall_status",
+    "study_type",
+    "modality",
+    "lead_sponsor_name",
+    "lead_sponsor_class",
+    "start_date",
+    "primary_completion_date",
+    "primary_completion_date_parsed",
+    "completion_date_parsed",
+    "last_update_post_date_parsed",
+    "results_first_post_date_parsed",
+)
+_PAYLOAD_INTS = ("enrollment", "location_count")
+_PAYLOAD_JSON_LISTS = (
+    ("phases_json", "phases"),
+    ("conditions_json", "conditions"),
+    ("interventions_json", "interventions"),
+    ("intervention_types_json", "intervention_types"),
+)
+_PAYLOAD_SCORE_INTS = (
+    ("urgency_score", "urgency"),
+    ("major_score", "major"),
+    ("interesting_score", "interesting"),
+    ("total_score", "total"),
+    ("days_to_primary_completion", "days_to_primary_completion"),
+)
+
+
+def build_trial_payload(
     record: Dict[str, Any],
     *,
     topic_name: str,
     scores: Dict[str, Any],
     raw_json: Optional[Dict[str, Any]] = None,
-) -> None:
-    nct_id = record.get("nct_id")
-    if not nct_id:
-        return
+) -> Optional[Dict[str, Any]]:
+    """Build the column payload for one trial, or None if it has no NCT id.
 
-    # merge topic tags
-    cur = conn.cursor()
-    cur.execute("SELECT topic_tags_json FROM trials WHERE nct_id = ?", (nct_id,))
-    row = cur.fetchone()
-    existing_tags: List[str] = []
-    if row and row["topic_tags_json"]:
-        try:
-            existing_tags = json.loads(row["topic_tags_json"]) or []
-        except Exception:
-            existing_tags = []
-    tags = list(dict.fromkeys(existing_tags + [topic_name]))  # dedup preserving order
+    Topic tags carry only this sync's topic; merging with tags already
+    stored happens in SQL at upsert time (no per-row SELECT round trip).
+    """
+    get = record.get
+    nct_id = get("nct_id")
+    if not nct_id:
+        return None
 
     phase = None
-    phases = record.get("phases") or []
+    phases = get("phases") or []
     if isinstance(phases, list) and phases:
         phase = str(phases[0])
 
-    payload = {
-        "nct_id": nct_id,
-        "brief_title": record.get("brief_title"),
-        "official_title": record.get("official_title"),
-        "acronym": record.get("acronym"),
-        "overall_status": record.get("overall_status"),
-        "study_type": record.get("study_type"),
-        "phase": phase,
-        "phases_json": _json(record.get("phases") or []),
-        "modality": record.get("modality"),
-        "enrollment": _safe_int(record.get("enrollment")),
-        "lead_sponsor_name": record.get("lead_sponsor_name"),
-        "lead_sponsor_class": record.get("lead_sponsor_class"),
-        "has_results": 1 if record.get("has_results") else 0,
-        "start_date": record.get("start_date"),
-        "primary_completion_date": record.get("primary_completion_date"),
-        "primary_completion_date_parsed": record.get("primary_completion_date_parsed"),
-        "completion_date_parsed": record.get("completion_date_parsed"),
-        "last_update_post_date_parsed": record.get("last_update_post_date_parsed"),
-        "results_first_post_date_parsed": record.get("results_first_post_date_parsed"),
-        "conditions_json": _json(record.get("conditions") or []),
-        "interventions_json": _json(record.get("interventions") or []),
-        "intervention_types_json": _json(record.get("intervention_types") or []),
-        "contacts_json": _json(record.get("contacts") or {}),
-        "location_count": _safe_int(record.get("location_count")),
-        "topic_tags_json": _json(tags),
-        "urgency_score": _safe_int(scores.get("urgency")),
-        "major_score": _safe_int(scores.get("major")),
-        "interesting_score": _safe_int(scores.get("interesting")),
-        "total_score": _safe_int(scores.get("total")),
-        "days_to_primary_completion": _safe_int(scores.get("days_to_primary_completion")),
-        "score_reasons_json": _json(scores.get("reasons") or {}),
-        "last_synced_utc": utcnow_iso(),
-        "raw_json": _json(raw_json) if raw_json is not None else None,
-    }
-
-    cols = ", ".join(payload.keys())
-    placeholders = ", ".join(["?"] * len(payload))
-    updates = ", ".join([f"{k}=excluded.{k}" for k in payload.keys() if k != "nct_id"])
+    payload: Dict[str, Any] = {"nct_id": nct_id}
+    for col in _PAYLOAD_PASSTHROUGH:
+        payload[col] = get(col)
+    for col in _PAYLOAD_INTS:
+        payload[col] = _safe_int(get(col))
+    for col, key in _PAYLOAD_JSON_LISTS:
+        payload[col] = _json(get(key) or [])
+    for col, key in _PAYLOAD_SCORE_INTS:
+        payload[col] = _safe_int(scores.get(key))
 
-    cur.execute(
-        f"""
-        INSERT INTO trials ({cols})
-        VALUES ({placeholders})
-        ON CONFLICT(nct_id) DO UPDATE SET
-          {updates}
-        """,
-        tuple(payload.values()),
+    payload["phase"] = phase
+    payload["has_results"] = 1 if get("has_results") else 0
+    payload["contacts_json"] = _json(get("contacts") or {})
+    payload["topic_tags_json"] = _json([topic_name])
+    payload["score_reasons_json"] = _json(scores.get("reasons") or {})
+    payload["last_synced_utc"] = utcnow_iso()
+    payload["raw_json"] = _json(raw_json) if raw_json is not None else None
+    return payload
+
+
+# SQLite's historical bound-parameter ceiling; stay under it when sizing
+# multi-row statements.
+_MAX_SQL_VARS = 999
+
+# Upsert SQL pieces, built once at import instead of per batch. The
+# column order matches the payload dicts from build_trial_payload.
+_TRIAL_COLS: Tuple[str, ...] = (
+    "nct_id",
+    "brief_title",
+    "official_title",
+    "acronym",
+    "overall_status",
+    "study_type",
+    "phase",
+    "phases_json",
+    "modality",
+    "enrollment",
+    "lead_sponsor_name",
+    "lead_sponsor_class",
+    "has_results",
+    "start_date",
+    "primary_completion_date",
+    "primary_completion_date_parsed",
+    "completion_date_parsed",
+    "last_update_post_date_parsed",
+    "results_first_post_date_parsed",
+    "conditions_json",
+    "interventions_json",
+    "intervention_types_json",
+    "contacts_json",
+    "location_count",
+    "topic_tags_json",
+    "urgency_score",
+    "major_score",
+    "interesting_score",
+    "total_score",
+    "days_to_primary_completion",
+    "score_reasons_json",
+    "last_synced_utc",
+    "raw_json",
+)
+
+# Topic tags append-merge in SQL: the incoming payload holds a
+# single-topic JSON array, appended only if not already present.
+_TAGS_MERGE = (
+    "topic_tags_json = CASE WHEN EXISTS ("
+    "SELECT 1 FROM json_each(COALESCE(trials.topic_tags_json, '[]')) "
+    "WHERE value = json_extract(excluded.topic_tags_json, '$[0]')"
+    ") THEN trials.topic_tags_json "
+    "ELSE json_insert(COALESCE(trials.topic_tags_json, '[]'), '$[#]', "
+    "json_extract(excluded.topic_tags_json, '$[0]')) END"
+)
+
+_TRIAL_UPDATES = ", ".join(
+    [_TAGS_MERGE if k == "topic_tags_json" else f"{k}=excluded.{k}" for k in _TRIAL_COLS if k != "nct_id"]
+)
+_TRIAL_ROW_PH = "(" + ", ".join(["?"] * len(_TRIAL_COLS)) + ")"
+_TRIAL_ROWS_PER_STMT = max(1, _MAX_SQL_VARS // len(_TRIAL_COLS))
+
+
+def _trials_insert_sql(n_rows: int) -> str:
+    return (
+        f"INSERT INTO trials ({', '.join(_TRIAL_COLS)}) VALUES "
+        + ", ".join([_TRIAL_ROW_PH] * n_rows)
+        + f" ON CONFLICT(nct_id) DO UPDATE SET {_TRIAL_UPDATES}"
     )
-    conn.commit()
+
+
+# Full-sized chunks all reuse this one string (and sqlite3's prepared-
+# statement cache); only the final short chunk builds its own.
+_TRIALS_INSERT_FULL_SQL = _trials_insert_sql(_TRIAL_ROWS_PER_STMT)
+
+
+def upsert_trials_batch(conn: sqlite3.Connection, payloads: List[Dict[str, Any]]) -> None:
+    """Upsert many trial payloads with multi-row INSERT ... ON CONFLICT.
+
+    One statement per chunk instead of one per trial; chunk size is
+    derived from the parameter limit.
+    """
+    if not payloads:
+        return
+
+    # Last write wins if the same NCT appears twice in a batch.
+    deduped = list({p["nct_id"]: p for p in payloads}.values())
+
+    cur = conn.cursor()
+    for i in range(0, len(deduped), _TRIAL_ROWS_PER_STMT):
+        chunk = deduped[i : i + _TRIAL_ROWS_PER_STMT]
+        sql = _TRIALS_INSERT_FULL_SQL if len(chunk) == _TRIAL_ROWS_PER_STMT else _trials_insert_sql(len(chunk))
+        args: List[Any] = []
+        for p in chunk:
+            args.extend(p[c] for c in _TRIAL_COLS)
+        cur.execute(sql, args)
+
+
+def upsert_trial(
+    conn: sqlite3.Connection,
+    record: Dict[str, Any],
+    *,
+    topic_name: str,
+    scores: Dict[str, Any],
+    raw_json: Optional[Dict[str, Any]] = None,
+) -> None:
+    payload = build_trial_payload(record, topic_name=topic_name, scores=scores, raw_json=raw_json)
+    if payload is not None:
+        upsert_trials_batch(conn, [payload])
 
 
 def update_pubmed_summary(
@@ -195,7 +334,6 @@ def update_pubmed_summary(
         """,
         (int(pubmed_count), pubmed_latest_date, utcnow_iso(), nct_id),
     )
-    conn.commit()
 
 
 def upsert_pubmed_citations(
@@ -203,34 +341,74 @@ def upsert_pubmed_citations(
     nct_id: str,
     citations: Iterable[Dict[str, Any]],
 ) -> None:
-    cur = conn.cursor()
     now = utcnow_iso()
-    for c in citations:
-        pmid = str(c.get("pmid", "")).strip()
-        if not pmid:
-            continue
-        cur.execute(
-            """
-            INSERT INTO pubmed_citations (nct_id, pmid, title, source, pub_date, doi, last_seen_utc)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(nct_id, pmid) DO UPDATE SET
-              title=excluded.title,
-              source=excluded.source,
-              pub_date=excluded.pub_date,
-              doi=excluded.doi,
-              last_seen_utc=excluded.last_seen_utc
-            """,
-            (
-                nct_id,
-                pmid,
-                c.get("title"),
-                c.get("source"),
-                c.get("pub_date"),
-                c.get("doi"),
-                now,
-            ),
-        )
-    conn.commit()
+    rows = [
+        (nct_id, pmid, c.get("title"), c.get("source"), c.get("pub_date"), c.get("doi"), now)
+        for c in citations
+        if (pmid := str(c.get("pmid", "")).strip())
+    ]
+    if not rows:
+        return
+    conn.executemany(
+        """
+        INSERT INTO pubmed_citations (nct_id, pmid, title, source, pub_date, doi, last_seen_utc)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(nct_id, pmid) DO UPDATE SET
+          title=excluded.title,
+          source=excluded.source,
+          pub_date=excluded.pub_date,
+          doi=excluded.doi,
+          last_seen_utc=excluded.last_seen_utc
+        """,
+        rows,
+    )
+
+
+# Columns the digest and CSV/Excel exports actually read; notably not
+# raw_json, which can dwarf every other column combined.
+_DIGEST_COLUMNS = (
+    "nct_id",
+    "brief_title",
+    "acronym",
+    "overall_status",
+    "study_type",
+    "phase",
+    "modality",
+    "enrollment",
+    "lead_sponsor_name",
+    "lead_sponsor_class",
+    "has_results",
+    "start_date",
+    "primary_completion_date",
+    "primary_completion_date_parsed",
+    "conditions_json",
+    "interventions_json",
+    "intervention_types_json",
+    "contacts_json",
+    "location_count",
+    "topic_tags_json",
+    "urgency_score",
+    "major_score",
+    "interesting_score",
+    "total_score",
+    "days_to_primary_completion",
+    "score_reasons_json",
+    "pubmed_count",
+    "pubmed_latest_date",
+)
+
+
+# The shared "actionable" predicate: readout soon, or recently
+# completed. A view cannot carry the two window parameters, so the
+# digest and link_pubmed queries share this fragment instead; bound
+# params are (readout_window_days, recently_completed_days).
+_ACTIONABLE_WHERE = """
+        days_to_primary_completion IS NOT NULL
+          AND (
+            (days_to_primary_completion BETWEEN 0 AND ?)
+            OR (days_to_primary_completion BETWEEN -? AND -1)
+          )
+"""
 
 
 def fetch_trials_for_digest(
@@ -238,25 +416,25 @@ def fetch_trials_for_digest(
     *,
     readout_window_days: int,
     recently_completed_days: int,
-) -> List[sqlite3.Row]:
-    """Return actionable trials for a digest report."""
+) -> Iterator[sqlite3.Row]:
+    """Yield actionable trials for a digest report in 500-row batches."""
     cur = conn.cursor()
     # Filter by primary completion date proximity if available.
     # We pre-compute days_to_primary_completion during scoring.
     cur.execute(
-        """
-        SELECT *
+        f"""
+        SELECT {', '.join(_DIGEST_COLUMNS)}
         FROM trials
-        WHERE days_to_primary_completion IS NOT NULL
-          AND (
-            (days_to_primary_completion BETWEEN 0 AND ?)
-            OR (days_to_primary_completion BETWEEN -? AND -1)
-          )
+        WHERE {_ACTIONABLE_WHERE}
         ORDER BY total_score DESC, primary_completion_date_parsed ASC
         """,
         (int(readout_window_days), int(recently_completed_days)),
     )
-    return list(cur.fetchall())
+    while True:
+        rows = cur.fetchmany(500)
+        if not rows:
+            break
+        yield from rows
 
 
 def fetch_actionable_nct_ids(
@@ -268,14 +446,10 @@ def fetch_actionable_nct_ids(
 ) -> List[str]:
     cur = conn.cursor()
     cur.execute(
-        """
+        f"""
         SELECT nct_id
         FROM trials
-        WHERE days_to_primary_completion IS NOT NULL
-          AND (
-            (days_to_primary_completion BETWEEN 0 AND ?)
-            OR (days_to_primary_completion BETWEEN -? AND -1)
-          )
+        WHERE {_ACTIONABLE_WHERE}
         ORDER BY total_score DESC
         LIMIT ?
         """,